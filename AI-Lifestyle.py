@@ -12,17 +12,129 @@
 
 import streamlit as st
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
+import numpy as np
 import plotly.express as px
 import os
-from datetime import datetime
+import json
+import pickle
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import profiling
 
 st.set_page_config(page_title='AI Lifestyle & Energy Predictor', layout='wide')
 
 st.title('AI Lifestyle & Energy Predictor')
-
-@st.cache_data
-def load_data_and_model():
+profiling.start_run('lifestyle')
+
+FEATURES = ['sleep_hours', 'steps', 'workout_intensity', 'junk_food_level', 'screen_time', 'stress_level']
+TARGET = 'energy_score'
+MODEL_DIR = 'model_store'
+MANIFEST_PATH = os.path.join(MODEL_DIR, 'energy_model.json')
+LOG_DB_PATH = 'lifestyle_log.db'
+LEGACY_LOG_CSV = 'lifestyle_log.csv'
+LOG_HISTORY_ROWS = 100
+LOG_COLUMNS = ['date'] + FEATURES + [TARGET]
+#(min, max, whole numbers only) - the same bounds as the input widgets
+FEATURE_RANGES = {
+    'sleep_hours': (3.0, 10.0, False),
+    'steps': (0, 30000, True),
+    'workout_intensity': (0, 3, True),
+    'junk_food_level': (1, 3, True),
+    'screen_time': (1.0, 12.0, False),
+    'stress_level': (1, 10, True),
+}
+MAX_GRID_STEPS = 1000
+HEATMAP_MAX_CELLS = 200
+BATCH_PREVIEW_ROWS = 1000
+#logged days are folded into the model once this many new rows exist, refitting on the
+#seed data plus at most TRAINING_WINDOW_ROWS of the most recent log
+RETRAIN_MIN_NEW_ROWS = 3
+TRAINING_WINDOW_ROWS = 5000
+
+#daily log - kept in SQLite with an index on date, so saving is a single insert and
+#the trend only reads the rows inside the selected window
+
+@st.cache_resource
+def init_log_db():
+    conn = sqlite3.connect(LOG_DB_PATH, factory=profiling.Connection)
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS lifestyle_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            sleep_hours REAL,
+            steps INTEGER,
+            workout_intensity INTEGER,
+            junk_food_level INTEGER,
+            screen_time REAL,
+            stress_level INTEGER,
+            energy_score INTEGER
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_lifestyle_log_date ON lifestyle_log (date)')
+    #version 1 - carry over rows logged to the old CSV file
+    if c.execute('PRAGMA user_version').fetchone()[0] < 1:
+        if os.path.exists(LEGACY_LOG_CSV) and c.execute('SELECT COUNT(*) FROM lifestyle_log').fetchone()[0] == 0:
+            legacy_df = pd.read_csv(LEGACY_LOG_CSV)
+            legacy_df['date'] = pd.to_datetime(legacy_df['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+            legacy_df = legacy_df.dropna(subset=['date']).reindex(columns=LOG_COLUMNS)
+            c.executemany(
+                f"INSERT INTO lifestyle_log ({', '.join(LOG_COLUMNS)}) VALUES ({', '.join('?' * len(LOG_COLUMNS))})",
+                legacy_df.astype(object).where(legacy_df.notna(), None).itertuples(index=False, name=None)
+            )
+        c.execute('PRAGMA user_version = 1')
+    #version 2 - only scores the user reported are real outcomes; rows logged before were labelled
+    #with the model's own prediction, so they are kept for the trend but never trained on
+    if c.execute('PRAGMA user_version').fetchone()[0] < 2:
+        columns = [row[1] for row in c.execute('PRAGMA table_info(lifestyle_log)')]
+        if 'self_reported' not in columns:
+            c.execute('ALTER TABLE lifestyle_log ADD COLUMN self_reported INTEGER NOT NULL DEFAULT 0')
+        c.execute('PRAGMA user_version = 2')
+    conn.commit()
+    conn.close()
+
+def query_log(query, params=()):
+    conn = sqlite3.connect(LOG_DB_PATH, factory=profiling.Connection)
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+def append_log(row):
+    columns = LOG_COLUMNS + ['self_reported']
+    conn = sqlite3.connect(LOG_DB_PATH, factory=profiling.Connection)
+    try:
+        with conn:
+            conn.execute(
+                f"INSERT INTO lifestyle_log ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [row[col] for col in columns]
+            )
+    finally:
+        conn.close()
+
+def load_log_history(limit=LOG_HISTORY_ROWS):
+    hist_df = query_log(
+        f"SELECT {', '.join(LOG_COLUMNS)} FROM lifestyle_log ORDER BY id DESC LIMIT ?",
+        (limit,)
+    )
+    return hist_df.iloc[::-1].reset_index(drop=True)
+
+def load_log_window(days):
+    start = (datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+    hist_df = query_log(
+        'SELECT date, energy_score FROM lifestyle_log WHERE date >= ? ORDER BY date, id',
+        (start,)
+    )
+    hist_df['date'] = pd.to_datetime(hist_df['date'])
+    return hist_df
+
+def log_has_rows():
+    return not query_log('SELECT 1 FROM lifestyle_log LIMIT 1').empty
+
+def load_training_data():
     data = {
         'sleep_hours': [7, 5, 8, 6, 4, 9, 7],
         'steps': [8000, 3000, 10000, 6000, 2000, 12000, 7500],
@@ -32,15 +144,212 @@ def load_data_and_model():
         'stress_level': [3, 8, 2, 5, 9, 2, 4],
         'energy_score': [80, 40, 90, 70, 30, 95, 75]
     }
-    df = pd.DataFrame(data)
-    X = df.drop('energy_score', axis=1)
-    y = df['energy_score']
-    model = RandomForestRegressor(random_state=42)
-    model.fit(X, y)
-    return df, X, model
+    return pd.DataFrame(data)
+
+def training_data_hash(df):
+    rows = pd.util.hash_pandas_object(df[FEATURES + [TARGET]], index=False)
+    return hashlib.sha256(rows.to_numpy().tobytes() + ','.join(FEATURES).encode()).hexdigest()
+
+#model artifact - trained once per training-data version and saved with its feature schema,
+#so new processes load it from disk instead of refitting
+def write_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def train_model(df):
+    #sklearn is only imported when a model actually has to be fitted
+    from sklearn.ensemble import RandomForestRegressor
+    model = RandomForestRegressor(random_state=42, n_jobs=-1)
+    model.fit(df[FEATURES], df[TARGET])
+    return model
+
+def save_model(model, data_hash, n_rows, log_watermark):
+    import sklearn
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    version = data_hash[:12]
+    artifact = f'energy_model-{version}.pkl'
+    write_atomic(os.path.join(MODEL_DIR, artifact), pickle.dumps(model))
+    manifest = {
+        'version': version,
+        'artifact': artifact,
+        'features': FEATURES,
+        'target': TARGET,
+        'training_data_hash': data_hash,
+        'training_rows': n_rows,
+        'log_watermark': log_watermark,
+        'sklearn_version': sklearn.__version__,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    #the manifest is swapped last, so readers never see it point at a half-written artifact
+    write_atomic(MANIFEST_PATH, json.dumps(manifest, indent=2).encode())
+    prune_artifacts(version)
+    return manifest
+
+#older versions are only ever reached through the manifest, so once it has moved on they can go
+def prune_artifacts(keep_version):
+    for name in os.listdir(MODEL_DIR):
+        if not name.startswith('energy_model-') or name.startswith(f'energy_model-{keep_version}.'):
+            continue
+        if name.endswith('.pkl') or name.endswith('.importance.json'):
+            try:
+                os.remove(os.path.join(MODEL_DIR, name))
+            except OSError:
+                pass
+
+def read_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('features') == FEATURES else None
+
+#retraining - the log is append-only, so its last id marks which rows a model has seen
+def latest_log_id():
+    conn = sqlite3.connect(LOG_DB_PATH, factory=profiling.Connection)
+    try:
+        return conn.execute('SELECT COALESCE(MAX(id), 0) FROM lifestyle_log').fetchone()[0]
+    finally:
+        conn.close()
+
+def count_new_log_rows(log_watermark):
+    conn = sqlite3.connect(LOG_DB_PATH, factory=profiling.Connection)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM lifestyle_log WHERE id > ? AND self_reported = 1',
+                            (log_watermark,)).fetchone()[0]
+    finally:
+        conn.close()
+
+#only days with a self-reported energy score are learned from, never the model's own predictions
+def build_training_frame(log_watermark):
+    logged = query_log(
+        f"SELECT {', '.join(FEATURES + [TARGET])} FROM lifestyle_log WHERE id <= ? AND self_reported = 1 "
+        "ORDER BY id DESC LIMIT ?",
+        (log_watermark, TRAINING_WINDOW_ROWS)
+    )
+    logged = logged.dropna().iloc[::-1].astype(float)
+    return pd.concat([load_training_data(), logged], ignore_index=True)
+
+#data_hash only keys the cache, so a model trained on different rows never reuses a stale frame
+@st.cache_data(max_entries=4)
+def training_frame(log_watermark, data_hash):
+    return build_training_frame(log_watermark)
+
+#a model is only current while the seed data and the logged rows up to its watermark still hash to
+#what it was trained on; an edited seed or a recreated log (ids behind the watermark) needs a refit
+def manifest_matches(manifest, latest_id):
+    log_watermark = manifest.get('log_watermark', 0)
+    if log_watermark > latest_id:
+        return False
+    return training_data_hash(build_training_frame(log_watermark)) == manifest.get('training_data_hash')
+
+@st.cache_data(max_entries=4)
+def model_is_current(version, latest_id, seed_hash):
+    manifest = read_manifest()
+    return manifest is not None and manifest['version'] == version and manifest_matches(manifest, latest_id)
+
+def retrain_model():
+    log_watermark = latest_log_id()
+    manifest = read_manifest()
+    #a retrain queued behind another one may find nothing left to learn
+    if manifest is not None and manifest.get('log_watermark', 0) == log_watermark and manifest_matches(manifest, log_watermark):
+        return manifest
+    df = build_training_frame(log_watermark)
+    model = train_model(df)
+    return save_model(model, training_data_hash(df), len(df), log_watermark)
+
+@st.cache_resource(show_spinner='Loading model...', max_entries=2)
+def load_model_artifact(artifact):
+    with open(os.path.join(MODEL_DIR, artifact), 'rb') as f:
+        model = pickle.load(f)
+    #score batches across all cores, also for artifacts saved before n_jobs was set
+    model.set_params(n_jobs=-1)
+    return model
+
+#the manifest is re-read on every run, so a model published by a background retrain
+#is picked up on the next rerun while the previous one keeps serving until then
+def load_model():
+    manifest = read_manifest()
+    seed_hash = training_data_hash(load_training_data())
+    if manifest is not None and model_is_current(manifest['version'], latest_log_id(), seed_hash):
+        try:
+            return load_model_artifact(manifest['artifact']), manifest
+        except (OSError, pickle.UnpicklingError, AttributeError, ImportError):
+            pass
+    with st.spinner('Training model...'):
+        manifest = retrain_model()
+    return load_model_artifact(manifest['artifact']), manifest
+
+@st.cache_resource
+def background_executor():
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='energy-model')
+
+@st.cache_resource
+def retrain_state():
+    return {'lock': threading.Lock(), 'job': None}
+
+def schedule_retrain(log_watermark):
+    state = retrain_state()
+    with state['lock']:
+        if state['job'] is not None and not state['job'].done():
+            return state['job']
+        if count_new_log_rows(log_watermark) < RETRAIN_MIN_NEW_ROWS:
+            return None
+        state['job'] = background_executor().submit(retrain_model)
+        return state['job']
+
+#feature importance - impurity and permutation scores are computed once per model version
+#on a background thread and saved next to the artifact, so predictions never wait on them
+def importance_path(version):
+    return os.path.join(MODEL_DIR, f'energy_model-{version}.importance.json')
+
+def compute_importance(model, df, version):
+    from sklearn.inspection import permutation_importance
+
+    path = importance_path(version)
+    if os.path.exists(path):
+        with open(path) as f:
+            importance = json.load(f)
+        if importance.get('features') == FEATURES:
+            return importance
+    perm = permutation_importance(model, df[FEATURES], df[TARGET], n_repeats=10, random_state=42)
+    importance = {
+        'version': version,
+        'features': FEATURES,
+        'impurity': model.feature_importances_.tolist(),
+        'permutation_mean': perm.importances_mean.tolist(),
+        'permutation_std': perm.importances_std.tolist(),
+    }
+    write_atomic(path, json.dumps(importance, indent=2).encode())
+    return importance
 
-train_df, X, model = load_data_and_model()
+@st.cache_resource
+def importance_job(_model, _df, version):
+    return background_executor().submit(compute_importance, _model, _df, version)
 
+@st.cache_data
+def importance_frame(version, importance):
+    imp_df = pd.DataFrame({
+        'feature': importance['features'],
+        'impurity': importance['impurity'],
+        'permutation': importance['permutation_mean'],
+    }).sort_values('permutation', ascending=False)
+    return imp_df.melt(id_vars='feature', var_name='method', value_name='importance')
+
+profiling.mark('Load model')
+init_log_db()
+model, model_info = load_model()
+train_df = training_frame(model_info.get('log_watermark', 0), model_info['training_data_hash'])
+importance = importance_job(model, train_df, model_info['version'])
+#a failed job is not kept for the version, so the next rerun submits it again
+if importance.done() and importance.exception() is not None:
+    importance_job.clear(model, train_df, model_info['version'])
+retrain_job = schedule_retrain(model_info.get('log_watermark', 0))
+
+profiling.mark('Predict')
 st.subheader('Enter today\'s lifestyle details')
 
 col1, col2, col3 = st.columns(3)
@@ -70,7 +379,8 @@ input_row = pd.DataFrame({
 })
 
 if st.button('Predict Energy'):
-    pred = model.predict(input_row)[0]
+    with profiling.section('Model predict'):
+        pred = model.predict(input_row)[0]
     st.session_state.pred_int = int(pred)
 
     st.subheader(f'Predicted Energy Score Today: {st.session_state.pred_int}/100')
@@ -93,61 +403,165 @@ if st.button('Predict Energy'):
     else:
         st.write('Your habits look quite balanced. Maintain consistency.')
 
-    feat_imp = model.feature_importances_
-    imp_df = pd.DataFrame({'feature': X.columns, 'importance': feat_imp}).sort_values('importance', ascending=False)
-
     st.subheader('Which habits influence energy the most (model view)')
-    fig = px.bar(imp_df, x='feature', y='importance')
-    st.plotly_chart(fig, use_container_width=True)
+    if not importance.done():
+        st.info('Feature importance is still being computed for this model version.')
+    elif importance.exception() is not None:
+        st.warning(f'Feature importance could not be computed: {importance.exception()}')
+    else:
+        imp_df = importance_frame(model_info['version'], importance.result())
+        fig = px.bar(imp_df, x='feature', y='importance', color='method', barmode='group')
+        st.plotly_chart(fig, use_container_width=True)
+
+#Batch mode - score an uploaded history or a what-if grid with one vectorized predict call
+
+def grid_axis(feature, n_steps):
+    low, high, whole = FEATURE_RANGES[feature]
+    values = np.linspace(low, high, n_steps)
+    return np.unique(np.round(values)) if whole else values
+
+@st.cache_data(show_spinner='Scoring grid...', max_entries=8)
+def score_grid(_model, model_version, x_feature, y_feature, x_steps, y_steps, fixed):
+    xs = grid_axis(x_feature, x_steps)
+    ys = grid_axis(y_feature, y_steps)
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    grid = pd.DataFrame({feature: np.full(grid_x.size, value, dtype=float) for feature, value in fixed})
+    grid[x_feature] = grid_x.ravel()
+    grid[y_feature] = grid_y.ravel()
+    scores = _model.predict(grid[FEATURES]).astype(np.float32)
+    return xs, ys, scores.reshape(grid_x.shape)
+
+def grid_table(xs, ys, scores, x_feature, y_feature):
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    return pd.DataFrame({x_feature: grid_x.ravel(), y_feature: grid_y.ravel(), 'predicted_energy': scores.ravel()})
+
+def read_batch(upload):
+    #only empty cells are missing, so the 'None' workout label is not read as NaN
+    batch_df = pd.read_csv(upload, keep_default_na=False, na_values=[''])
+    missing = [f for f in FEATURES if f not in batch_df.columns]
+    if missing:
+        return batch_df, missing
+    #labels from the input widgets are accepted as well as their numeric codes
+    batch_df['workout_intensity'] = batch_df['workout_intensity'].replace(workout_map)
+    batch_df['junk_food_level'] = batch_df['junk_food_level'].replace(junk_map)
+    for feature in FEATURES:
+        batch_df[feature] = pd.to_numeric(batch_df[feature], errors='coerce')
+    return batch_df, []
+
+profiling.mark('Batch prediction')
+st.subheader('Batch prediction and what-if analysis')
+
+batch_mode = st.radio('Batch source', ['What-if grid', 'Upload CSV'], horizontal=True)
+
+if batch_mode == 'What-if grid':
+    with st.form('what_if_grid'):
+        gcol1, gcol2 = st.columns(2)
+        x_feature = gcol1.selectbox('X axis', FEATURES, index=FEATURES.index('sleep_hours'))
+        x_steps = gcol1.number_input('X steps', 2, MAX_GRID_STEPS, 50)
+        y_feature = gcol2.selectbox('Y axis', FEATURES, index=FEATURES.index('steps'))
+        y_steps = gcol2.number_input('Y steps', 2, MAX_GRID_STEPS, 50)
+        st.caption("Other habits are held at today's inputs.")
+        run_grid = st.form_submit_button('Run what-if sweep')
+
+    if run_grid or 'what_if' in st.session_state:
+        if x_feature == y_feature:
+            st.warning('Pick two different habits for the axes.')
+        else:
+            if run_grid:
+                fixed = tuple((f, float(input_row[f].iloc[0])) for f in FEATURES)
+                st.session_state.what_if = (x_feature, y_feature, int(x_steps), int(y_steps), fixed)
+            x_feature, y_feature, x_steps, y_steps, fixed = st.session_state.what_if
+            with profiling.section('Score grid'):
+                xs, ys, scores = score_grid(model, model_info['version'], x_feature, y_feature, x_steps, y_steps, fixed)
+
+            #the heatmap is strided for display, the table and download keep every grid point
+            x_stride = -(-len(xs) // HEATMAP_MAX_CELLS)
+            y_stride = -(-len(ys) // HEATMAP_MAX_CELLS)
+            fig = px.imshow(scores[::y_stride, ::x_stride], x=xs[::x_stride], y=ys[::y_stride], origin='lower',
+                            aspect='auto', color_continuous_scale='RdYlGn',
+                            labels={'x': x_feature, 'y': y_feature, 'color': 'predicted energy'},
+                            title=f'Predicted energy across {x_feature} and {y_feature}')
+            st.plotly_chart(fig, use_container_width=True)
+
+            results = grid_table(xs, ys, scores, x_feature, y_feature)
+            st.write(f'{scores.size:,} scenarios scored')
+            st.dataframe(results.nlargest(BATCH_PREVIEW_ROWS, 'predicted_energy'), hide_index=True)
+            st.download_button('Download grid (CSV)', lambda: results.to_csv(index=False),
+                               file_name='what_if_grid.csv', mime='text/csv')
+else:
+    batch_upload = st.file_uploader('Lifestyle history CSV', type=['csv'])
+    if batch_upload is not None:
+        batch_df, missing = read_batch(batch_upload)
+        if missing:
+            st.error(f"Missing columns: {', '.join(missing)}")
+        else:
+            scorable = batch_df[FEATURES].notna().all(axis=1)
+            batch_df['predicted_energy'] = np.nan
+            if scorable.any():
+                with profiling.section('Model predict batch'):
+                    batch_df.loc[scorable, 'predicted_energy'] = model.predict(batch_df.loc[scorable, FEATURES])
+            if not scorable.all():
+                st.warning(f'{(~scorable).sum()} rows skipped because of missing or non-numeric values.')
+            st.write(f'{scorable.sum():,} rows scored')
+            st.dataframe(batch_df.head(BATCH_PREVIEW_ROWS), hide_index=True)
+            if 'date' in batch_df.columns:
+                trend_df = batch_df.assign(date=pd.to_datetime(batch_df['date'], errors='coerce')).dropna(subset=['date', 'predicted_energy'])
+                if not trend_df.empty:
+                    fig = px.line(trend_df.sort_values('date'), x='date', y='predicted_energy', title='Predicted energy over the uploaded history')
+                    st.plotly_chart(fig, use_container_width=True)
+            st.download_button('Download predictions (CSV)', lambda: batch_df.to_csv(index=False),
+                               file_name='energy_predictions.csv', mime='text/csv')
 
 st.subheader('Sample training data')
 st.dataframe(train_df)
+st.caption(f"Model version {model_info['version']}, trained on {model_info['training_rows']} rows at {model_info['trained_at']}")
+if retrain_job is not None and not retrain_job.done():
+    st.caption('Retraining on newly logged days, the updated model will be used once it is ready.')
 
 #mini task----
 #Allow user to log data daily and store it in a CSV.
 
+profiling.mark('Daily log')
 st.subheader("Log Today's Data")
 
+#the score the user actually felt is what the model retrains on, so it is never prefilled with the prediction
+actual_energy = st.number_input('Your actual energy score today (0-100)', 0, 100, value=None,
+                                placeholder='How energetic did you feel?')
+
 if st.button("Save Today's Data"):
 
-    if 'pred_int' not in st.session_state:
-        st.warning("Please click 'Predict Energy' first.")
+    if actual_energy is None:
+        st.warning('Please enter your actual energy score first.')
     else:
-        log_df = input_row.copy()
-        log_df['energy_score'] = st.session_state.pred_int
-        log_df['date'] = datetime.now().strftime('%Y-%m-%d')
-
-        if os.path.exists('lifestyle_log.csv'):
-            log_df.to_csv('lifestyle_log.csv', mode='a', header=False, index=False)
-        else:
-            log_df.to_csv('lifestyle_log.csv', index=False)
+        log_row = {col: input_row[col].iloc[0].item() for col in FEATURES}
+        log_row['energy_score'] = int(actual_energy)
+        log_row['self_reported'] = 1
+        log_row['date'] = datetime.now().strftime('%Y-%m-%d')
+        append_log(log_row)
+        schedule_retrain(model_info.get('log_watermark', 0))
 
         st.success("Data logged successfully!")
 
     st.subheader("Log History")
-    hist_df = pd.read_csv('lifestyle_log.csv')
-    st.dataframe(hist_df)
+    st.dataframe(load_log_history())
+    st.caption(f'Showing the latest {LOG_HISTORY_ROWS} entries.')
 
 #Show last 7 or 30 days energy score trend with line chart.
 
+profiling.mark('Trend')
 st.subheader("Energy Score Trend")
 
-if os.path.exists("lifestyle_log.csv"):
-
-    hist_df = pd.read_csv("lifestyle_log.csv")
+if log_has_rows():
 
-    if not hist_df.empty:
-
-        hist_df["date"] = pd.to_datetime(hist_df["date"])
-       
-        hist_df = hist_df.sort_values("date")
     days_option = st.radio( "Select Trend Period",["Last 7 Days", "Last 30 Days"],horizontal=True)
 
-    if days_option == "Last 7 Days":
-        filtered_df = hist_df.tail(7)
+    filtered_df = load_log_window(7 if days_option == "Last 7 Days" else 30)
+    if filtered_df.empty:
+        st.info(f"No entries logged in the {days_option.lower()}.")
     else:
-        filtered_df = hist_df.tail(30)
-    fig = px.line(filtered_df,x="date",y="energy_score",markers=True,title=f"{days_option} Energy Score Trend")
-    st.plotly_chart(fig, use_container_width=True)
+        fig = px.line(filtered_df,x="date",y="energy_score",markers=True,title=f"{days_option} Energy Score Trend")
+        st.plotly_chart(fig, use_container_width=True)
 else:
-    st.info("Log some data and predict energy to see the trend.")
\ No newline at end of file
+    st.info("Log some data to see the trend.")
+
+profiling.render_panel()
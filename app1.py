@@ -12,8 +12,227 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import sqlite3
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import profiling
+
+CSV_CHUNK_ROWS = 200_000
+PARSE_WORKERS = 4
+EXPENSE_DTYPES = {'Category': 'category', 'Amount': 'float64'}
+
+#ingestion - every upload is parsed once and reused on reruns, keyed by its content hash
+def upload_hash(file):
+    hashes = st.session_state.setdefault('upload_hashes', {})
+    if file.file_id not in hashes:
+        hashes[file.file_id] = hashlib.sha256(file.getbuffer()).hexdigest()
+    return hashes[file.file_id]
+
+#cache_resource hands back the same frame instead of a copy, so treat it as read-only
+@st.cache_resource(show_spinner=False, max_entries=32)
+def parse_expense_file(content_hash, _file):
+    _file.seek(0)
+    frames = []
+    for chunk in pd.read_csv(_file, dtype=EXPENSE_DTYPES, chunksize=CSV_CHUNK_ROWS):
+        chunk['Date'] = pd.to_datetime(chunk['Date'], errors='coerce')
+        frames.append(chunk)
+    if not frames:
+        return pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'),
+                             'Category': pd.Series(dtype='category'),
+                             'Amount': pd.Series(dtype='float64')})
+    df = pd.concat(frames, ignore_index=True)
+    df['Category'] = df['Category'].astype('category')
+    return df
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_expense_data(content_hashes, _files):
+    with ThreadPoolExecutor(max_workers=min(PARSE_WORKERS, len(_files))) as pool:
+        frames = list(pool.map(parse_expense_file, content_hashes, _files))
+    df = pd.concat(frames, ignore_index=True)
+    df['Category'] = df['Category'].astype('category')
+    return df
+
+#chart downsampling - payloads stay bounded by chart width, not by row count
+CHART_WIDTH_PX = 1000
+PIE_MAX_SLICES = 8
+
+#largest-triangle-three-buckets: keeps the first and last point and, per bucket,
+#the point forming the largest triangle with the previous pick and the next bucket's mean
+def lttb_indices(x, y, n_out):
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    picked = np.empty(n_out, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        area = np.abs((x[prev] - avg_x) * (y[start:stop] - y[prev])
+                      - (x[prev] - x[start:stop]) * (avg_y - y[prev]))
+        prev = start + int(area.argmax())
+        picked[i + 1] = prev
+    return picked
+
+def downsample(df, x, y, n_out=CHART_WIDTH_PX):
+    points = df.dropna(subset=[x, y]).sort_values(x)
+    x_values = points[x].to_numpy()
+    if np.issubdtype(x_values.dtype, np.datetime64):
+        x_values = x_values.astype('datetime64[ns]').astype('int64')
+    x_values = x_values.astype('float64')
+    return points.iloc[lttb_indices(x_values, points[y].to_numpy('float64'), n_out)]
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def upload_chart_points(content_hashes, _df):
+    return downsample(_df[['Date', 'Amount', 'Category']], 'Date', 'Amount')
+
+def pie_slices(totals, max_slices=PIE_MAX_SLICES):
+    totals = totals.sort_values(ascending=False)
+    if len(totals) <= max_slices:
+        return totals
+    other = pd.Series({'Other': totals.iloc[max_slices - 1:].sum()})
+    return pd.concat([totals.iloc[:max_slices - 1], other]).groupby(level=0).sum().sort_values(ascending=False)
+
+#database
+DB_PATH = 'expense_data.db'
+IMPORT_BATCH_ROWS = 10_000
+PAGE_SIZE = 100
+
+@st.cache_resource
+def init_expense_db():
+    conn = sqlite3.connect(DB_PATH, factory=profiling.Connection)
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS expense_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            category TEXT,
+            amount REAL
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS upload_ledger (
+            file_hash TEXT PRIMARY KEY,
+            file_name TEXT,
+            row_count INTEGER,
+            imported_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS expense_rollup (
+            month TEXT,
+            category TEXT,
+            total REAL,
+            txn_count INTEGER,
+            min_amount REAL,
+            max_amount REAL,
+            PRIMARY KEY (month, category)
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_expense_date ON expense_data (date)')
+    #category filter plus the id sort key, covering the page columns, so a filtered page is read in order
+    #straight from the index; it replaces the (category, date) index, which left every page to a sort
+    c.execute('DROP INDEX IF EXISTS idx_expense_category_date')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_expense_category_id ON expense_data (category, id, date, amount)')
+    #version 1 - rollups start empty and only count ledgered imports. Rows saved before the ledger were
+    #re-inserted on every rerun and kept the CSV's raw date text, so they would inflate the totals and
+    #land in the wrong months; they stay browsable under Past Uploads but are not totalled
+    if c.execute('PRAGMA user_version').fetchone()[0] < 1:
+        c.execute('DELETE FROM expense_rollup')
+        c.execute('PRAGMA user_version = 1')
+    conn.commit()
+    conn.close()
+
+#rows without a date or amount cannot be placed in a month, so they are left out of the rollups
+ROLLUP_UPSERT = '''
+    INSERT INTO expense_rollup (month, category, total, txn_count, min_amount, max_amount)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (month, category) DO UPDATE SET
+        total = total + excluded.total,
+        txn_count = txn_count + excluded.txn_count,
+        min_amount = MIN(min_amount, excluded.min_amount),
+        max_amount = MAX(max_amount, excluded.max_amount)
+'''
+
+def monthly_rollup(df):
+    dated = df.dropna(subset=['Date', 'Amount'])
+    keys = [dated['Date'].dt.strftime('%Y-%m').rename('month'),
+            dated['Category'].astype(object).fillna('Uncategorized').rename('category')]
+    return dated.groupby(keys)['Amount'].agg(['sum', 'count', 'min', 'max']).reset_index()
+
+def load_rollup():
+    conn = sqlite3.connect(DB_PATH, factory=profiling.Connection)
+    try:
+        return pd.read_sql_query('SELECT * FROM expense_rollup ORDER BY month', conn)
+    finally:
+        conn.close()
+
+#one extra row is fetched so the caller knows whether a next page exists. With a category filter each
+#category is its own branch, read in id order from idx_expense_category_id and cut at the page size,
+#so a page only ever merges page_size + 1 rows per category instead of sorting the filtered set
+def fetch_expense_page(after_id, date_range, categories, page_size=PAGE_SIZE):
+    where = ['id > ?']
+    params = [after_id]
+    if len(date_range) == 2:
+        where.append('date BETWEEN ? AND ?')
+        params += [date_range[0].isoformat(), date_range[1].isoformat()]
+    columns = 'id AS "ID", date AS "Date", category AS "Category", amount AS "Amount"'
+    if categories:
+        branches, branch_params = [], []
+        for cat in categories:
+            clause, cat_params = ('category IS NULL', []) if cat == 'Uncategorized' else ('category = ?', [cat])
+            branches.append(f'''
+                SELECT * FROM (SELECT {columns} FROM expense_data
+                WHERE {' AND '.join([clause] + where)} ORDER BY id LIMIT ?)''')
+            branch_params += cat_params + params + [page_size + 1]
+        query = ' UNION ALL '.join(branches) + ' ORDER BY "ID" LIMIT ?'
+        params = branch_params
+    else:
+        query = f'''
+            SELECT {columns}
+            FROM expense_data WHERE {' AND '.join(where)}
+            ORDER BY id LIMIT ?
+        '''
+    conn = sqlite3.connect(DB_PATH, factory=profiling.Connection)
+    try:
+        return pd.read_sql_query(query, conn, params=params + [page_size + 1])
+    finally:
+        conn.close()
+
+def import_expense_file(content_hash, file_name, df):
+    conn = sqlite3.connect(DB_PATH, timeout=30, factory=profiling.Connection)
+    try:
+        if conn.execute('SELECT 1 FROM upload_ledger WHERE file_hash = ?', (content_hash,)).fetchone():
+            return False
+
+        dates = df['Date'].dt.strftime('%Y-%m-%d').astype(object)
+        dates = dates.where(df['Date'].notna(), None)
+        categories = df['Category'].astype(object).where(df['Category'].notna(), None)
+        amounts = df['Amount'].astype(object).where(df['Amount'].notna(), None)
+
+        #ledger row and expense rows commit together, so a file is never half imported or imported twice
+        with conn:
+            c = conn.cursor()
+            c.execute('INSERT OR IGNORE INTO upload_ledger (file_hash, file_name, row_count) VALUES (?, ?, ?)',
+                      (content_hash, file_name, len(df)))
+            if c.rowcount == 0:
+                return False
+            for start in range(0, len(df), IMPORT_BATCH_ROWS):
+                stop = start + IMPORT_BATCH_ROWS
+                c.executemany('INSERT INTO expense_data (date, category, amount) VALUES (?, ?, ?)',
+                              zip(dates[start:stop], categories[start:stop], amounts[start:stop]))
+            c.executemany(ROLLUP_UPSERT, monthly_rollup(df).itertuples(index=False, name=None))
+        return True
+    finally:
+        conn.close()
+
+profiling.start_run('app1')
+profiling.mark('Login')
+init_expense_db()
 
 # Login authentication 
 user = st.text_input("User Name")
@@ -41,72 +260,92 @@ if not st.session_state.logged:
 st.set_page_config(page_title='Personal Expense Tracker Dashboard', layout='wide')
 st.title('Personal Expense Tracker Dashboard')
 
+profiling.mark('Uploads')
 upload = st.file_uploader('Upload Expense Data', type=['csv'],accept_multiple_files=True)
 if upload:
-    all_data = []
-
-    for file in upload:
-        df = pd.read_csv(file)
-        all_data.append(df)
-
-    df = pd.concat(all_data, ignore_index=True)
+    with st.spinner('Reading uploads...'):
+        content_hashes = tuple(upload_hash(file) for file in upload)
+        df = load_expense_data(content_hashes, upload)
 
     st.subheader("Expense Data Preview")
     st.dataframe(df)
- 
+
+    st.subheader("Upload Transactions")
+    points = upload_chart_points(content_hashes, df)
+    fig_points = px.line(points, x='Date', y='Amount', hover_data=['Category'])
+    st.plotly_chart(fig_points,use_container_width=True)
+    if len(points) < len(df):
+        st.caption(f"Showing {len(points):,} of {len(df):,} transactions, downsampled to preserve the trend shape.")
+
+#Database save for past uploads - each file is imported once, tracked by its content hash
+    for content_hash, file in zip(content_hashes, upload):
+        if import_expense_file(content_hash, file.name, parse_expense_file(content_hash, file)):
+            st.success(f"Imported {file.name} into past uploads.")
+
+#dashboard - totals and trends come from the monthly rollups, not the raw rows
+profiling.mark('Dashboard')
+rollup = load_rollup()
+if rollup.empty:
+    st.info("Upload expense data to see the dashboard.")
+else:
 #categorization
+    category_totals = rollup.groupby('category')['total'].sum()
+    monthly_totals = rollup.groupby('month', as_index=False)['total'].sum()
+    monthly_totals['month'] = pd.to_datetime(monthly_totals['month'], format='%Y-%m', errors='coerce')
+
     st.subheader("Expense Categories")
-    st.write(df.groupby('Category')['Amount'].sum())
+    st.write(category_totals)
 
     col1, col2 = st.columns(2)
 #pie
     with col1:   
         st.subheader("Expense Distribution")
-        fig = px.pie(df, values = 'Amount' , names='Category')
+        slices = pie_slices(category_totals).rename_axis('category').reset_index(name='total')
+        fig = px.pie(slices, values='total', names='category')
         st.plotly_chart(fig,use_container_width=True)
     with col2:
 #line
         st.subheader("Monthly Expense Trend")
-        fig2 = px.line(df, x='Date',y='Amount', title = 'Monthly Expense Trend')
+        fig2 = px.line(downsample(monthly_totals, 'month', 'total'), x='month', y='total', markers=True, title = 'Monthly Expense Trend')
         st.plotly_chart(fig2,use_container_width=True)
 
 #budget limit
+    total_expenses = rollup['total'].sum()
+
     st.subheader("Budget Limit Alerts")
     budget_limit = st.number_input('Enter your budget limit', min_value=10000.0)
 
-    if df['Amount'].sum() > budget_limit:
+    if total_expenses > budget_limit:
         st.warning("You have spent more than your budget limit.")
 
     st.subheader("Summary")
-    st.write(f"Total Expenses: {df['Amount'].sum()}")
-    st.write(f"Maximum Expense: {df['Amount'].max()}")
-    st.write(f"Minimum Expense: {df['Amount'].min()}")
+    st.write(f"Total Expenses: {total_expenses}")
+    st.write(f"Maximum Expense: {rollup['max_amount'].max()}")
+    st.write(f"Minimum Expense: {rollup['min_amount'].min()}")
 
-#Database save for past uploads
-    
-    conn = sqlite3.connect('expense_data.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS expense_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT,
-            category TEXT,
-            amount REAL
-        )
-    ''')
-    for index, row in df.iterrows():
-        c.execute('INSERT INTO expense_data (date, category, amount) VALUES (?, ?, ?)', (row['Date'], row['Category'], row['Amount']))
-    conn.commit()
-    conn.close()
+#past uploads - keyset paged on id, only the visible page is read
+profiling.mark('Past uploads')
+st.subheader("Past Uploads")
 
-    #past uploads
-    st.subheader("Past Uploads")
-    conn = sqlite3.connect('expense_data.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM expense_data")
-    past_uploads = c.fetchall()
-    conn.close()
+filter_col1, filter_col2 = st.columns(2)
+date_range = filter_col1.date_input('Date range', value=[], key='past_dates')
+categories = filter_col2.multiselect('Categories', sorted(rollup['category'].unique()), key='past_categories')
+
+filters = (tuple(date_range), tuple(categories))
+if st.session_state.get('past_filters') != filters:
+    st.session_state.past_filters = filters
+    st.session_state.past_pages = [0]
+
+page = fetch_expense_page(st.session_state.past_pages[-1], date_range, categories)
+has_next = len(page) > PAGE_SIZE
+page = page.head(PAGE_SIZE)
+st.dataframe(page, hide_index=True)
 
-    past_uploads_df = pd.DataFrame(past_uploads, columns=['ID', 'Date', 'Category', 'Amount'])
-    st.dataframe(past_uploads_df)
+nav_col1, nav_col2, nav_col3 = st.columns([1, 1, 4])
+nav_col1.button('Previous', disabled=len(st.session_state.past_pages) == 1,
+                on_click=lambda: st.session_state.past_pages.pop())
+nav_col2.button('Next', disabled=not has_next,
+                on_click=st.session_state.past_pages.append, args=(int(page['ID'].iloc[-1]) if has_next else 0,))
+nav_col3.caption(f"Page {len(st.session_state.past_pages)}")
 
+profiling.render_panel()
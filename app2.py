@@ -11,30 +11,145 @@ import streamlit as st
 import pandas as pd
 import sqlite3
 import plotly.express as px
+import queue
+import io
+import csv
+import tempfile
+import itertools
+import logging
+from contextlib import contextmanager
+import profiling
 
 st.title("College Event Management and Registration System")
 
-conn = sqlite3.connect('event.db')
-c = conn.cursor()
+DB_PATH = 'event.db'
+POOL_SIZE = 8
+BUSY_TIMEOUT_S = 30
+STATEMENT_CACHE_SIZE = 256
 
-c.execute('''CREATE TABLE IF NOT EXISTS events
-    (id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        date TEXT,
-        time TEXT,
-        location TEXT)''')
+logger = logging.getLogger(__name__)
 
-c.execute('''CREATE TABLE IF NOT EXISTS participants
-          (id INTEGER PRIMARY KEY AUTOINCREMENT,
-          name TEXT,
-          email TEXT,
-          phone INTEGER,
-          event_id INTEGER,
-          year INTEGER,
-          FOREIGN KEY (event_id) REFERENCES events (id))''')
+#connection layer - schema and WAL are set up once per process, connections are reused across reruns
+def connect():
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_S, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE, factory=profiling.Connection)
+    conn.execute('PRAGMA synchronous = NORMAL')
+    return conn
 
-conn.commit()
-conn.close()
+#schema migrations, tracked with PRAGMA user_version
+def migrate(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version < 1:
+        with conn:
+            dedupe_participants(conn)
+            conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS ux_participants_email_event ON participants (lower(email), event_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_participants_event_year ON participants (event_id, year)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_participants_year ON participants (year)')
+            conn.execute('PRAGMA user_version = 1')
+    if version < 2:
+        #every committed write bumps the counter, so any process can tell when its cached reads are stale
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS data_version
+                (id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL)''')
+            conn.execute('INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)')
+            for table in ('events', 'participants'):
+                for action in ('INSERT', 'UPDATE', 'DELETE'):
+                    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS bump_version_{table}_{action.lower()}
+                        AFTER {action} ON {table}
+                        BEGIN UPDATE data_version SET version = version + 1 WHERE id = 1; END''')
+            conn.execute('PRAGMA user_version = 2')
+    if version < 3:
+        #emails are compared case-insensitively, like the bulk import already did
+        with conn:
+            conn.execute('DROP INDEX IF EXISTS ux_participants_email_event')
+            dedupe_participants(conn)
+            conn.execute('UPDATE participants SET email = lower(trim(email)) WHERE email IS NOT lower(trim(email))')
+            conn.execute('CREATE UNIQUE INDEX ux_participants_email_event ON participants (lower(email), event_id)')
+            conn.execute('PRAGMA user_version = 3')
+
+#keep the first registration of any duplicate (email, event) pair so the unique index can be built
+def dedupe_participants(conn):
+    removed = conn.execute('''DELETE FROM participants WHERE id NOT IN
+        (SELECT MIN(id) FROM participants GROUP BY lower(trim(email)), event_id)''').rowcount
+    if removed:
+        logger.warning('Removed %d duplicate registrations (same email and event) from %s', removed, DB_PATH)
+    return removed
+
+@st.cache_resource
+def init_db():
+    conn = connect()
+    conn.execute('PRAGMA journal_mode = WAL')
+    with conn:
+        conn.execute('''CREATE TABLE IF NOT EXISTS events
+            (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                date TEXT,
+                time TEXT,
+                location TEXT)''')
+
+        conn.execute('''CREATE TABLE IF NOT EXISTS participants
+                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT,
+                  email TEXT,
+                  phone INTEGER,
+                  event_id INTEGER,
+                  year INTEGER,
+                  FOREIGN KEY (event_id) REFERENCES events (id))''')
+
+    migrate(conn)
+
+    #idle connections; a borrowed connection is only ever used by one thread at a time
+    idle = queue.LifoQueue(maxsize=POOL_SIZE)
+    idle.put(conn)
+    return idle
+
+@contextmanager
+def db():
+    idle = init_db()
+    try:
+        conn = idle.get_nowait()
+    except queue.Empty:
+        conn = connect()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+#cached reads - keyed on the data version, so they are served from memory until a write lands
+def data_version():
+    with db() as conn:
+        return conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()[0]
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_events(version):
+    with db() as conn:
+        c = conn.cursor()
+        c.execute("SELECT * FROM events")
+        return pd.DataFrame(c.fetchall(), columns=["ID", "Name", "Date", "Time", "Location"])
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_participants(version):
+    with db() as conn:
+        c = conn.cursor()
+        c.execute("SELECT * FROM participants")
+        return pd.DataFrame(c.fetchall(), columns=["ID", "Name", "Email", "Phone", "Event ID", "Year"])
+
+#one pass for the totals, one index-only pass for the (event, year) breakdown
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_stats(version):
+    with db() as conn:
+        c = conn.cursor()
+        c.execute("SELECT (SELECT COUNT(*) FROM events), (SELECT COUNT(*) FROM participants)")
+        num_events, num_participants = c.fetchone()
+        c.execute("SELECT event_id, year, COUNT(*) FROM participants GROUP BY event_id, year")
+        breakdown = pd.DataFrame(c.fetchall(), columns=["Event ID", "Year", "Count"])
+    return num_events, num_participants, breakdown
 
 def create_event():
     st.header("Create Event")
@@ -44,24 +159,18 @@ def create_event():
     location = st.text_input("Location")
 
     if st.button("Create"):
-        conn = sqlite3.connect('event.db')
-        c = conn.cursor()
-        c.execute("INSERT INTO events (name, date, time, location) VALUES (?, ?, ?, ?)", (name, date, time, location))
-        conn.commit()
-        conn.close()
+        with db() as conn:
+            c = conn.cursor()
+            c.execute("INSERT INTO events (name, date, time, location) VALUES (?, ?, ?, ?)", (name, date, time, location))
+            conn.commit()
         st.success("Event created successfully!")
 
 def view_events():
     st.header("View Events")
 
-    conn = sqlite3.connect('event.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM events")
-    events = c.fetchall()
-    conn.close()
+    df = load_events(data_version())
 
-    if events:
-        df = pd.DataFrame(events, columns=["ID", "Name", "Date", "Time", "Location"])
+    if not df.empty:
         st.dataframe(df)
     else:
         st.write("No events found.")
@@ -70,50 +179,167 @@ def view_events():
 def register_participant():
     st.header("Register Participant")
 
+    mode = st.radio("Mode", ["Single", "Bulk CSV"], horizontal=True)
+    if mode == "Bulk CSV":
+        bulk_register()
+        return
+
     name = st.text_input("Name")
-    email = st.text_input("Email")
+    email = st.text_input("Email").strip().lower()
     phone = st.text_input("Phone")
     event_id = st.number_input("Event ID")
     year = st.number_input("Year")
 
     if st.button("Register"):
-        conn = sqlite3.connect('event.db')
-        c = conn.cursor()
-        c.execute("INSERT INTO participants (name, email, phone, event_id, year) VALUES (?, ?, ?, ?, ?)", (name, email, phone, event_id, year))
-        conn.commit()
-        conn.close()
-        st.success("Participant registered successfully!")
+        try:
+            with db() as conn:
+                c = conn.cursor()
+                c.execute("INSERT INTO participants (name, email, phone, event_id, year) VALUES (?, ?, ?, ?, ?)", (name, email, phone, event_id, year))
+                conn.commit()
+        except sqlite3.IntegrityError:
+            st.error("This email is already registered for that event.")
+        else:
+            st.success("Participant registered successfully!")
+
+#bulk registration - the whole sheet is validated column-wise, valid rows go in one transaction
+REGISTRATION_COLUMNS = ["name", "email", "phone", "event_id", "year"]
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[^@\s]+"
+PHONE_PATTERN = r"\d{7,15}"
+MIN_YEAR, MAX_YEAR = 1, 5
+IMPORT_BATCH_ROWS = 5000
+
+def validate_registrations(df, event_ids, registered):
+    df = df.copy()
+    df["name"] = df["name"].astype("string").str.strip()
+    df["email"] = df["email"].astype("string").str.strip().str.lower()
+    df["phone"] = df["phone"].astype("string").str.replace(r"[\s\-()+]", "", regex=True)
+    df["event_id"] = pd.to_numeric(df["event_id"], errors="coerce")
+    df["year"] = pd.to_numeric(df["year"], errors="coerce")
+
+    checks = {
+        "missing name": df["name"].fillna("").eq(""),
+        "invalid email": ~df["email"].str.fullmatch(EMAIL_PATTERN).fillna(False).astype(bool),
+        "invalid phone": ~df["phone"].str.fullmatch(PHONE_PATTERN).fillna(False).astype(bool),
+        f"year must be {MIN_YEAR}-{MAX_YEAR}": ~(df["year"].between(MIN_YEAR, MAX_YEAR) & (df["year"] % 1 == 0)),
+        "unknown event": ~df["event_id"].isin(event_ids),
+        "duplicate in file": df.duplicated(["email", "event_id"], keep="first"),
+        "already registered": pd.Series(pd.MultiIndex.from_frame(df[["email", "event_id"]]).isin(registered), index=df.index),
+    }
+    errors = pd.Series("", index=df.index)
+    for reason, failed in checks.items():
+        errors = errors.mask(failed, errors + reason + "; ")
+    errors = errors.str.rstrip("; ")
+
+    valid = df[errors.eq("")].astype({"event_id": "int64", "year": "int64"})
+    rejected = df[errors.ne("")].assign(error=errors[errors.ne("")])
+    return valid, rejected
+
+def import_registrations(valid):
+    rows = valid[REGISTRATION_COLUMNS].astype(object).itertuples(index=False, name=None)
+    inserted = 0
+    with db() as conn:
+        with conn:
+            c = conn.cursor()
+            while True:
+                batch = list(itertools.islice(rows, IMPORT_BATCH_ROWS))
+                if not batch:
+                    break
+                c.executemany("INSERT OR IGNORE INTO participants (name, email, phone, event_id, year) VALUES (?, ?, ?, ?, ?)", batch)
+                #rowcount leaves out the data_version bumps made by triggers, total_changes would not
+                inserted += c.rowcount
+    return inserted
+
+def bulk_register():
+    st.write("Upload a CSV with columns: " + ", ".join(REGISTRATION_COLUMNS))
+    upload = st.file_uploader("Registrations CSV", type=["csv"])
+    if upload is None:
+        return
+
+    df = pd.read_csv(upload, dtype=str)
+    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+    missing = [col for col in REGISTRATION_COLUMNS if col not in df.columns]
+    if missing:
+        st.error("Missing columns: " + ", ".join(missing))
+        return
+
+    if st.button("Import"):
+        with db() as conn:
+            c = conn.cursor()
+            event_ids = [row[0] for row in c.execute("SELECT id FROM events")]
+            c.execute("SELECT lower(email), event_id FROM participants WHERE event_id IN (SELECT id FROM events)")
+            registered = pd.MultiIndex.from_tuples(c.fetchall(), names=["email", "event_id"])
+
+        valid, rejected = validate_registrations(df[REGISTRATION_COLUMNS], event_ids, registered)
+        inserted = import_registrations(valid) if not valid.empty else 0
+        st.success(f"Registered {inserted} of {len(df)} participants.")
+
+        if not rejected.empty:
+            st.error(f"{len(rejected)} rows were rejected.")
+            st.dataframe(rejected.head(100))
+            st.download_button("Download Error Report", rejected.to_csv(index=False),
+                               file_name="registration_errors.csv", mime="text/csv", on_click="ignore")
 
 #View registered participants
 def view_participants():
     st.header("View Participants")
 
-    conn = sqlite3.connect('event.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM participants")
-    participants = c.fetchall()
-    conn.close()
+    df = load_participants(data_version())
 
-    if participants:
-        df = pd.DataFrame(participants, columns=["ID", "Name", "Email", "Phone", "Event ID", "Year"])
+    if not df.empty:
         st.dataframe(df)
     else:
         st.write("No participants found.")
 
-#export csv data
+#export csv data - rows are streamed from the cursor in batches and only when Download is clicked
+EXPORT_BATCH_ROWS = 5000
+EXPORT_COLUMNS = ["ID", "Name", "Email", "Phone", "Year", "Event ID", "Event Name", "Event Date", "Event Location"]
+
+def participants_csv(event_id=None):
+    query = """SELECT p.id, p.name, p.email, p.phone, p.year, p.event_id, e.name, e.date, e.location
+        FROM participants p LEFT JOIN events e ON e.id = p.event_id"""
+    params = ()
+    if event_id is not None:
+        query += " WHERE p.event_id = ?"
+        params = (event_id,)
+    query += " ORDER BY p.id"
+
+    #spooled to a temp file so memory stays at one batch however large the export is
+    text = io.TextIOWrapper(tempfile.TemporaryFile(), encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    with db() as conn:
+        c = conn.execute(query, params)
+        while True:
+            rows = c.fetchmany(EXPORT_BATCH_ROWS)
+            if not rows:
+                break
+            writer.writerows(rows)
+    text.flush()
+    return text.detach().detach()
+
 def export_participants():
     st.header("Export Participants")
 
-    conn = sqlite3.connect('event.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM participants")
-    participants = c.fetchall()
-    conn.close()
+    with db() as conn:
+        c = conn.cursor()
+        c.execute("SELECT id, name FROM events ORDER BY id")
+        events = dict(c.fetchall())
+
+    event_id = st.selectbox("Event", [None] + list(events),
+                            format_func=lambda i: "All events" if i is None else f"{i} - {events[i]}")
+
+    with db() as conn:
+        c = conn.cursor()
+        if event_id is None:
+            c.execute("SELECT COUNT(*) FROM participants")
+        else:
+            c.execute("SELECT COUNT(*) FROM participants WHERE event_id = ?", (event_id,))
+        num_participants = c.fetchone()[0]
 
-    if participants:
-        df = pd.DataFrame(participants, columns=["ID", "Name", "Email", "Phone", "Event ID", "Year"])
-        csv_data = df.to_csv(index=False)
-        st.download_button("Download CSV", csv_data, file_name="participants.csv")
+    if num_participants:
+        st.write(f"{num_participants} participants")
+        file_name = "participants.csv" if event_id is None else f"participants_event_{event_id}.csv"
+        st.download_button("Download CSV", lambda: participants_csv(event_id), file_name=file_name, mime="text/csv")
     else:
         st.write("No participants found.")
 
@@ -122,13 +348,9 @@ def export_participants():
 def view_stats():
     st.header("Event Statistics")
 
-    conn = sqlite3.connect('event.db')
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM events")
-    num_events = c.fetchone()[0]
-    c.execute("SELECT COUNT(*) FROM participants")
-    num_participants = c.fetchone()[0]
-    conn.close()
+    num_events, num_participants, breakdown = load_stats(data_version())
+    participants_by_event = breakdown.groupby("Event ID", as_index=False, dropna=False)["Count"].sum()
+    participants_by_year = breakdown.groupby("Year", as_index=False, dropna=False)["Count"].sum()
 
     st.write(f"Number of Events: {num_events}")
     st.write(f"Number of Participants: {num_participants}")
@@ -137,30 +359,16 @@ def view_stats():
     col1, col2 = st.columns(2)
     with col1:
     #bar chart
-        conn = sqlite3.connect('event.db')
-        c = conn.cursor()
-        c.execute("SELECT event_id, COUNT(*) FROM participants GROUP BY event_id")
-        participants_by_event = c.fetchall()
-        conn.close()
-
-        if participants_by_event:
-            df = pd.DataFrame(participants_by_event, columns=["Event ID", "Count"])
-            fig = px.bar(df, x="Event ID", y="Count", title="Participants by Event")
+        if not participants_by_event.empty:
+            fig = px.bar(participants_by_event, x="Event ID", y="Count", title="Participants by Event")
             st.plotly_chart(fig)
         else:
             st.write("No participants found.")
 
     with col2:
     #Pie chart
-        conn = sqlite3.connect('event.db')
-        c = conn.cursor()
-        c.execute("SELECT year, COUNT(*) FROM participants GROUP BY year")
-        participants_by_year = c.fetchall()
-        conn.close()
-
-        if participants_by_year:
-            df = pd.DataFrame(participants_by_year, columns=["Year", "Count"])
-            fig = px.pie(df, values="Count", names="Year", title="Participants by Year")
+        if not participants_by_year.empty:
+            fig = px.pie(participants_by_year, values="Count", names="Year", title="Participants by Year")
             st.plotly_chart(fig)
         else:
             st.write("No participants found.")
@@ -168,6 +376,7 @@ def view_stats():
 
 #main function
 def main():
+    profiling.start_run("app2")
     st.sidebar.title("Features")
     pages = {
         "Create Event": create_event,
@@ -178,7 +387,9 @@ def main():
         "View Statistics": view_stats
     }
     selected_page = st.sidebar.selectbox("Select a page", list(pages.keys()))
+    profiling.mark(selected_page)
     pages[selected_page]()
+    profiling.render_panel()
 
 if __name__ == "__main__":
     main()
@@ -11,32 +11,501 @@
 import streamlit as st
 import sqlite3
 import pandas as pd
-from datetime import datetime
+import io
+import itertools
+import json
+import re
+import tempfile
+from datetime import datetime, timedelta
+import profiling
+
+DB_PATH = "inventory.db"
+BUSY_TIMEOUT_S = 30
+SEARCH_LIMIT = 50
+IMPORT_BATCH_ROWS = 10_000
+TOP_STOCK_PRODUCTS = 20
+DEFAULT_REORDER_LEVEL = 10
+SALES_PAGE_SIZE = 100
+EXPORT_CHUNK_ROWS = 10_000
+
+#category rows are created with INSERT ... WHERE NOT EXISTS rather than INSERT OR IGNORE, because an
+#outer upsert or OR REPLACE statement overrides the conflict clause of statements inside its triggers
+KPI_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS kpi_products_insert AFTER INSERT ON products BEGIN
+        UPDATE inventory_summary SET product_count = product_count + 1 WHERE id = 1;
+        INSERT INTO category_stock (category, product_count, quantity)
+        SELECT COALESCE(NEW.category, ''), 0, 0
+        WHERE NOT EXISTS (SELECT 1 FROM category_stock WHERE category = COALESCE(NEW.category, ''));
+        UPDATE category_stock SET product_count = product_count + 1, quantity = quantity + COALESCE(NEW.quantity, 0)
+        WHERE category = COALESCE(NEW.category, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS kpi_products_delete AFTER DELETE ON products BEGIN
+        UPDATE inventory_summary SET product_count = product_count - 1 WHERE id = 1;
+        UPDATE category_stock SET product_count = product_count - 1, quantity = quantity - COALESCE(OLD.quantity, 0)
+        WHERE category = COALESCE(OLD.category, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS kpi_products_update AFTER UPDATE OF category, quantity ON products BEGIN
+        UPDATE category_stock SET product_count = product_count - 1, quantity = quantity - COALESCE(OLD.quantity, 0)
+        WHERE category = COALESCE(OLD.category, '');
+        INSERT INTO category_stock (category, product_count, quantity)
+        SELECT COALESCE(NEW.category, ''), 0, 0
+        WHERE NOT EXISTS (SELECT 1 FROM category_stock WHERE category = COALESCE(NEW.category, ''));
+        UPDATE category_stock SET product_count = product_count + 1, quantity = quantity + COALESCE(NEW.quantity, 0)
+        WHERE category = COALESCE(NEW.category, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS kpi_sales_insert AFTER INSERT ON sales BEGIN
+        UPDATE inventory_summary SET total_revenue = total_revenue + COALESCE(NEW.total_price, 0),
+        units_sold = units_sold + COALESCE(NEW.quantity_sold, 0) WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS kpi_sales_delete AFTER DELETE ON sales BEGIN
+        UPDATE inventory_summary SET total_revenue = total_revenue - COALESCE(OLD.total_price, 0),
+        units_sold = units_sold - COALESCE(OLD.quantity_sold, 0) WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS kpi_sales_update AFTER UPDATE OF quantity_sold, total_price ON sales BEGIN
+        UPDATE inventory_summary
+        SET total_revenue = total_revenue - COALESCE(OLD.total_price, 0) + COALESCE(NEW.total_price, 0),
+        units_sold = units_sold - COALESCE(OLD.quantity_sold, 0) + COALESCE(NEW.quantity_sold, 0) WHERE id = 1;
+    END""",
+]
+
+SEARCH_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS fts_products_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, category) VALUES (NEW.id, NEW.name, NEW.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fts_products_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, category) VALUES ('delete', OLD.id, OLD.name, OLD.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS fts_products_update AFTER UPDATE OF name, category ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, category) VALUES ('delete', OLD.id, OLD.name, OLD.category);
+        INSERT INTO products_fts (rowid, name, category) VALUES (NEW.id, NEW.name, NEW.category);
+    END""",
+]
+
+#sales summary totals per product and per product and day, kept current by triggers so the View Sales
+#summary reads a row per product instead of aggregating the sales table. Sales without a product id are
+#keyed by their product name; product_key has no type, so ids stay integers and names stay text
+SALES_SUMMARY_KEY = "COALESCE({row}.product_id, {row}.product_name, '')"
+SALES_SUMMARY_DAY = "substr(COALESCE({row}.sale_date, ''), 1, 10)"
+
+def sales_summary_change(row, sign):
+    key, day = SALES_SUMMARY_KEY.format(row=row), SALES_SUMMARY_DAY.format(row=row)
+    totals = f"""sale_count = sale_count {sign} 1,
+        quantity_sold = quantity_sold {sign} COALESCE({row}.quantity_sold, 0),
+        total_sales = total_sales {sign} COALESCE({row}.total_price, 0)"""
+    if sign == "-":
+        return f"""
+        UPDATE product_sales SET {totals} WHERE product_key = {key};
+        UPDATE product_sales_daily SET {totals} WHERE product_key = {key} AND sale_day = {day};"""
+    return f"""
+        INSERT INTO product_sales (product_key, product_id, product_name, sale_count, quantity_sold, total_sales)
+        SELECT {key}, {row}.product_id, {row}.product_name, 0, 0, 0
+        WHERE NOT EXISTS (SELECT 1 FROM product_sales WHERE product_key = {key});
+        UPDATE product_sales SET {totals}, product_name = COALESCE({row}.product_name, product_name)
+        WHERE product_key = {key};
+        INSERT INTO product_sales_daily (product_key, sale_day, product_id, product_name, sale_count, quantity_sold, total_sales)
+        SELECT {key}, {day}, {row}.product_id, {row}.product_name, 0, 0, 0
+        WHERE NOT EXISTS (SELECT 1 FROM product_sales_daily WHERE product_key = {key} AND sale_day = {day});
+        UPDATE product_sales_daily SET {totals}, product_name = COALESCE({row}.product_name, product_name)
+        WHERE product_key = {key} AND sale_day = {day};"""
+
+SALES_SUMMARY_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS summary_sales_insert AFTER INSERT ON sales BEGIN
+        {sales_summary_change("NEW", "+")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS summary_sales_delete AFTER DELETE ON sales BEGIN
+        {sales_summary_change("OLD", "-")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS summary_sales_update
+    AFTER UPDATE OF product_id, product_name, quantity_sold, total_price, sale_date ON sales BEGIN
+        {sales_summary_change("OLD", "-")}
+        {sales_summary_change("NEW", "+")}
+    END""",
+]
+
+#schema migrations, tracked with PRAGMA user_version
+def migrate(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        #sales reference products by id, so renaming a product keeps its history
+        with conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(sales)")]
+            if "product_id" not in columns:
+                conn.execute("ALTER TABLE sales ADD COLUMN product_id INTEGER REFERENCES products (id)")
+            #the name -> id map is built once and joined, instead of a products scan per sale
+            conn.execute("""
+            UPDATE sales SET product_id = m.id
+            FROM (SELECT name, MIN(id) AS id FROM products GROUP BY name) m
+            WHERE m.name = sales.product_name AND sales.product_id IS NULL""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_date ON sales (sale_date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_product_date ON sales (product_id, sale_date)")
+            conn.execute("PRAGMA user_version = 1")
+    if version < 2:
+        #dashboard KPIs kept current by triggers, so the dashboard never scans products or sales
+        with conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS inventory_summary (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                product_count INTEGER NOT NULL,
+                total_revenue REAL NOT NULL,
+                units_sold INTEGER NOT NULL
+            )""")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS category_stock (
+                category TEXT PRIMARY KEY,
+                product_count INTEGER NOT NULL,
+                quantity INTEGER NOT NULL
+            )""")
+            conn.execute("""
+            INSERT OR REPLACE INTO inventory_summary (id, product_count, total_revenue, units_sold)
+            SELECT 1, (SELECT COUNT(*) FROM products),
+                   (SELECT COALESCE(SUM(total_price), 0) FROM sales),
+                   (SELECT COALESCE(SUM(quantity_sold), 0) FROM sales)""")
+            conn.execute("DELETE FROM category_stock")
+            conn.execute("""
+            INSERT INTO category_stock (category, product_count, quantity)
+            SELECT COALESCE(category, ''), COUNT(*), COALESCE(SUM(quantity), 0) FROM products
+            GROUP BY COALESCE(category, '')""")
+            for trigger in KPI_TRIGGERS:
+                conn.execute(trigger)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_products_quantity ON products (quantity)")
+            conn.execute("PRAGMA user_version = 2")
+    if version < 3:
+        #quantities stored as text defeated indexes; reorder levels replace the hardcoded threshold of 10,
+        #and the partial index holds exactly the products at or below their reorder level
+        with conn:
+            conn.execute("""
+            UPDATE products SET quantity = CAST(quantity AS INTEGER)
+            WHERE typeof(quantity) NOT IN ('integer', 'null')""")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(products)")]
+            if "reorder_level" not in columns:
+                conn.execute(f"ALTER TABLE products ADD COLUMN reorder_level INTEGER NOT NULL DEFAULT {DEFAULT_REORDER_LEVEL}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_products_low_stock ON products (quantity) WHERE quantity <= reorder_level")
+            conn.execute("PRAGMA user_version = 3")
+    if version < 4:
+        #full-text index over name and category, kept in sync with products by triggers
+        with conn:
+            conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts
+            USING fts5(name, category, content='products', content_rowid='id')""")
+            conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+            for trigger in SEARCH_TRIGGERS:
+                conn.execute(trigger)
+            conn.execute("PRAGMA user_version = 4")
+    if version < 5:
+        #supplier catalogs are matched on SKU
+        with conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(products)")]
+            if "sku" not in columns:
+                conn.execute("ALTER TABLE products ADD COLUMN sku TEXT")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_products_sku ON products (sku)")
+            for trigger in ("kpi_products_insert", "kpi_products_update"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            for trigger in KPI_TRIGGERS:
+                conn.execute(trigger)
+            conn.execute("PRAGMA user_version = 5")
+    if version < 6:
+        #products without a SKU are claimed by name on catalog import; the partial index holds only those
+        with conn:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_products_no_sku ON products (name) WHERE sku IS NULL")
+            conn.execute("PRAGMA user_version = 6")
+    if version < 7:
+        #sales summary totals, built once from the existing sales and kept current by triggers
+        with conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_sales (
+                product_key PRIMARY KEY,
+                product_id INTEGER,
+                product_name TEXT,
+                sale_count INTEGER NOT NULL,
+                quantity_sold INTEGER NOT NULL,
+                total_sales REAL NOT NULL
+            )""")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_sales_daily (
+                product_key,
+                sale_day TEXT NOT NULL,
+                product_id INTEGER,
+                product_name TEXT,
+                sale_count INTEGER NOT NULL,
+                quantity_sold INTEGER NOT NULL,
+                total_sales REAL NOT NULL,
+                PRIMARY KEY (product_key, sale_day)
+            )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_product_sales_daily_day ON product_sales_daily (sale_day)")
+            conn.execute("DELETE FROM product_sales")
+            conn.execute("DELETE FROM product_sales_daily")
+            key, day = SALES_SUMMARY_KEY.format(row="sales"), SALES_SUMMARY_DAY.format(row="sales")
+            conn.execute(f"""
+            INSERT INTO product_sales (product_key, product_id, product_name, sale_count, quantity_sold, total_sales)
+            SELECT {key}, MAX(product_id), MAX(product_name), COUNT(*),
+                   COALESCE(SUM(quantity_sold), 0), COALESCE(SUM(total_price), 0)
+            FROM sales GROUP BY 1""")
+            conn.execute(f"""
+            INSERT INTO product_sales_daily (product_key, sale_day, product_id, product_name, sale_count, quantity_sold, total_sales)
+            SELECT {key}, {day}, MAX(product_id), MAX(product_name), COUNT(*),
+                   COALESCE(SUM(quantity_sold), 0), COALESCE(SUM(total_price), 0)
+            FROM sales GROUP BY 1, 2""")
+            for trigger in SALES_SUMMARY_TRIGGERS:
+                conn.execute(trigger)
+            conn.execute("PRAGMA user_version = 7")
+
+#schema and WAL journaling are set up once per process
+@st.cache_resource
+def init_db():
+    conn = sqlite3.connect(DB_PATH, factory=profiling.Connection)
+    conn.execute("PRAGMA journal_mode = WAL")
+    cursor = conn.cursor()
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        category TEXT,
+        price REAL,
+        quantity INTEGER
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sales (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_name TEXT,
+        quantity_sold INTEGER,
+        total_price REAL,
+        sale_date TEXT
+    )
+    """)
+
+    migrate(conn)
+    conn.close()
+
+#one connection per browser session, so cashiers never queue on a shared connection;
+#a session only runs one script at a time, so the connection is never used concurrently
+def get_conn():
+    if "conn" not in st.session_state:
+        init_db()
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_S, check_same_thread=False, factory=profiling.Connection)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        st.session_state.conn = conn
+    return st.session_state.conn
+
+#stock checks and decrements are conditional UPDATEs inside one short write transaction,
+#so concurrent sales can neither lose updates nor oversell; if any line is short the whole order rolls back.
+#Returns the order total (None if it was rolled back) and the products the order took to their reorder level
+def process_order(conn, items):
+    order = {}
+    for product_id, quantity_sold in items:
+        order[product_id] = order.get(product_id, 0) + quantity_sold
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        cursor = conn.cursor()
+        cursor.executemany("""
+        UPDATE products SET quantity = quantity - ? WHERE id = ? AND quantity >= ?""",
+        [(quantity_sold, product_id, quantity_sold) for product_id, quantity_sold in order.items()])
+        if cursor.rowcount != len(order):
+            conn.rollback()
+            return None, []
+
+        placeholders = ", ".join("?" * len(order))
+        low_stock = [name for (name,) in cursor.execute(
+            f"SELECT name FROM products WHERE id IN ({placeholders}) AND quantity <= reorder_level", list(order))]
+        products = cursor.execute(f"SELECT id, name, price FROM products WHERE id IN ({placeholders})",
+                                  list(order)).fetchall()
+        sale_date = datetime.now().isoformat()
+        sales = [(product_id, name, order[product_id], order[product_id] * float(price), sale_date)
+                 for product_id, name, price in products]
+        cursor.executemany("""
+        INSERT INTO sales (product_id, product_name, quantity_sold, total_price, sale_date)
+        VALUES (?, ?, ?, ?, ?)""", sales)
+        conn.commit()
+        return sum(sale[3] for sale in sales), low_stock
+    except Exception:
+        conn.rollback()
+        raise
+
+#date-range and product filters for sales reports, answered from the sale_date / (product_id, sale_date) indexes
+def sales_filter(date_range, product_id, after_id=None):
+    where, params = [], []
+    if after_id is not None:
+        where.append("s.id > ?")
+        params.append(after_id)
+    if product_id is not None:
+        where.append("s.product_id = ?")
+        params.append(product_id)
+    if len(date_range) == 2:
+        where.append("s.sale_date >= ? AND s.sale_date < ?")
+        params += [date_range[0].isoformat(), (date_range[1] + timedelta(days=1)).isoformat()]
+    return (" WHERE " + " AND ".join(where) if where else ""), params
+
+SALES_QUERY = """
+    SELECT s.id, s.product_id, COALESCE(p.name, s.product_name) AS product_name,
+    s.quantity_sold, s.total_price, s.sale_date
+    FROM sales s LEFT JOIN products p ON p.id = s.product_id"""
+SALES_DTYPES = {"id": "Int64", "product_id": "Int64", "product_name": "string",
+                "quantity_sold": "Int64", "total_price": "float64", "sale_date": "string"}
+
+#read from the trigger-maintained totals, so the cost follows the number of products (and days in the
+#date range), never the number of sales
+def load_sales_summary(conn, date_range, product_id):
+    table, where, params = "product_sales", ["sale_count != 0"], []
+    if product_id is not None:
+        where.append("product_key = ?")
+        params.append(product_id)
+    if len(date_range) == 2:
+        table = "product_sales_daily"
+        where.append("sale_day >= ? AND sale_day < ?")
+        params += [date_range[0].isoformat(), (date_range[1] + timedelta(days=1)).isoformat()]
+    return pd.read_sql_query(f"""
+    SELECT MAX(product_id) AS product_id, MAX(product_name) AS product_name,
+    SUM(quantity_sold) AS total_quantity_sold, SUM(total_sales) AS total_sales
+    FROM {table}
+    WHERE {" AND ".join(where)}
+    GROUP BY product_key""", conn, params=params)
+
+#exports stream the query result in chunks into a temp file; they run on their own connection
+#because Streamlit calls them outside the script run
+def export_query(query, params, file_format, dtype=None):
+    out = tempfile.TemporaryFile()
+    export_conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_S, factory=profiling.Connection)
+    try:
+        chunks = pd.read_sql_query(query, export_conn, params=params, chunksize=EXPORT_CHUNK_ROWS, dtype=dtype)
+        if file_format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            writer = None
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(out, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            if writer is not None:
+                writer.close()
+        else:
+            text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(text, header=i == 0, index=False)
+            text.flush()
+            out = text.detach()
+    finally:
+        export_conn.close()
+    return out.detach()
+
+#product search - prefix matches on every typed word, best matches first, never more than SEARCH_LIMIT rows
+def search_products(conn, text, limit=SEARCH_LIMIT):
+    terms = re.findall(r"\w+", text or "")
+    if not terms:
+        return pd.read_sql_query("SELECT * FROM products ORDER BY id LIMIT ?", conn, params=(limit,))
+    match = " ".join(f'"{term}"*' for term in terms)
+    return pd.read_sql_query("""
+    SELECT p.* FROM products_fts f JOIN products p ON p.id = f.rowid
+    WHERE products_fts MATCH ? ORDER BY f.rank LIMIT ?""", conn, params=(match, limit))
+
+def product_picker(label, key, all_label=None):
+    text = st.text_input(f"Search {label.lower()}", key=f"{key}_search",
+                         placeholder="Type part of a product name or category")
+    matches = search_products(conn, text)
+    names = dict(zip(matches["id"].tolist(), matches["name"]))
+    options = ([None] if all_label else []) + list(names)
+    selected = st.selectbox(label, options, key=key,
+                            format_func=lambda i: all_label if i is None else f"{names[i]} (#{i})")
+    return selected, names
+
+#bulk catalog import - the file is staged in a temp table, then upserted by SKU in one transaction;
+#rows whose values already match are left alone so the KPI and search triggers only fire for real changes
+CATALOG_COLUMNS = ["sku", "name", "category", "price", "quantity", "reorder_level"]
+CATALOG_DTYPES = {"sku": "string", "name": "string", "category": "string",
+                  "price": "float64", "quantity": "Int64", "reorder_level": "Int64"}
+CATALOG_CHANGED = """(products.name IS NOT excluded.name OR products.category IS NOT excluded.category
+    OR products.price IS NOT excluded.price OR products.quantity IS NOT excluded.quantity
+    OR products.reorder_level IS NOT excluded.reorder_level)"""
+
+def read_catalog(upload):
+    if upload.name.lower().endswith(".parquet"):
+        df = pd.read_parquet(upload)
+    else:
+        #every column is read as text, since the headers are only normalized below and a "SKU" header
+        #would otherwise be parsed as a number ("00123" -> 123); import_catalog converts the numeric ones
+        df = pd.read_csv(upload, dtype=str)
+    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+    if "reorder_level" not in df.columns:
+        df["reorder_level"] = None
+    return df
+
+def import_catalog(conn, df):
+    df = df[CATALOG_COLUMNS].copy()
+    df["sku"] = df["sku"].astype("string").str.strip().replace("", pd.NA)
+    df["price"] = pd.to_numeric(df["price"], errors="coerce")
+    df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce").round().astype("Int64")
+    df["reorder_level"] = pd.to_numeric(df["reorder_level"], errors="coerce").round().astype("Int64")
+    valid = df["sku"].notna() & df["name"].notna() & df["price"].notna() & df["quantity"].notna()
+    skipped = int((~valid).sum())
+    rows = df[valid].astype(object).where(df[valid].notna(), None).itertuples(index=False, name=None)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DROP TABLE IF EXISTS temp.catalog_import")
+        cursor.execute("""
+        CREATE TEMP TABLE catalog_import (
+            sku TEXT PRIMARY KEY, name TEXT, category TEXT, price REAL, quantity INTEGER, reorder_level INTEGER
+        )""")
+        while True:
+            batch = list(itertools.islice(rows, IMPORT_BATCH_ROWS))
+            if not batch:
+                break
+            cursor.executemany("INSERT OR REPLACE INTO catalog_import VALUES (?, ?, ?, ?, ?, ?)", batch)
+
+        #products added before SKUs existed are claimed by name, so the first supplier import updates them
+        #instead of adding a duplicate of each; one product per name, and only SKUs no product uses yet.
+        #The join starts from the idx_products_no_sku partial index, so it is free once every product has a SKU
+        cursor.execute("""
+        UPDATE products SET sku = m.sku
+        FROM (SELECT MIN(c.sku) AS sku, MIN(p.id) AS id
+              FROM products p JOIN catalog_import c ON c.name = p.name
+              WHERE p.sku IS NULL AND NOT EXISTS (SELECT 1 FROM products s WHERE s.sku = c.sku)
+              GROUP BY p.name) m
+        WHERE products.id = m.id""")
+
+        #a missing reorder level keeps the product's current one (the default for new products), resolved
+        #here so the change count below and the upsert compare exactly the values that get written
+        cursor.execute(f"""
+        UPDATE catalog_import SET reorder_level = COALESCE(
+            (SELECT products.reorder_level FROM products WHERE products.sku = catalog_import.sku),
+            {DEFAULT_REORDER_LEVEL})
+        WHERE reorder_level IS NULL""")
+
+        staged, existing = cursor.execute("""
+        SELECT COUNT(*), COUNT(products.id) FROM catalog_import excluded
+        LEFT JOIN products ON products.sku = excluded.sku""").fetchone()
+        updated = cursor.execute(f"""
+        SELECT COUNT(*) FROM catalog_import excluded JOIN products ON products.sku = excluded.sku
+        WHERE {CATALOG_CHANGED}""").fetchone()[0]
+
+        cursor.execute(f"""
+        INSERT INTO products (sku, name, category, price, quantity, reorder_level)
+        SELECT sku, name, category, price, quantity, reorder_level
+        FROM catalog_import WHERE true
+        ON CONFLICT (sku) DO UPDATE SET
+            name = excluded.name, category = excluded.category, price = excluded.price,
+            quantity = excluded.quantity,
+            reorder_level = excluded.reorder_level
+        WHERE {CATALOG_CHANGED}""")
+        cursor.execute("DROP TABLE temp.catalog_import")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {"inserted": staged - existing, "updated": updated, "unchanged": existing - updated, "skipped": skipped}
 
-conn = sqlite3.connect("inventory.db", check_same_thread=False)
-cursor = conn.cursor()
+def show_low_stock(low_stock):
+    if low_stock:
+        st.warning("Reorder soon, stock is at or below the reorder level for: " + ", ".join(low_stock))
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS products (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT,
-    category TEXT,
-    price REAL,
-    quantity INTEGER
-)
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS sales (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    product_name TEXT,
-    quantity_sold INTEGER,
-    total_price REAL,
-    sale_date TEXT
-)
-""")
-
-conn.commit()
+profiling.start_run("app3")
+conn = get_conn()
+cursor = conn.cursor()
 
 #sidebar
 st.set_page_config(page_title="Inventory Management System", layout="wide")
@@ -48,6 +517,7 @@ menu = st.sidebar.selectbox("Select Option", [
     "View Sales",
     "Dashboard"
 ])
+profiling.mark(menu)
 
 #Manage products - add ,update, delete
 
@@ -55,40 +525,57 @@ if menu == "Manage Products":
     #add
     st.subheader("Add New Product")
 
+    sku = st.text_input("SKU")
     name = st.text_input("Product Name")
     category = st.text_input("Category")
     price = st.number_input("Price", min_value=0.0)
     quantity = st.number_input("Quantity", min_value=0)
+    reorder_level = st.number_input("Reorder Level", min_value=0, value=DEFAULT_REORDER_LEVEL)
 
     if st.button("Add Product"):
-        cursor.execute("""
-        INSERT INTO products (name, category, price, quantity)
-        VALUES (?, ?, ?, ?)
-        """, (name, category, price, quantity))
-        conn.commit()
-        st.success("Product Added Successfully!")
+        try:
+            cursor.execute("""
+            INSERT INTO products (sku, name, category, price, quantity, reorder_level)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """, (sku.strip() or None, name, category, price, int(quantity), int(reorder_level)))
+            conn.commit()
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            st.error("A product with this SKU already exists.")
+        else:
+            st.success("Product Added Successfully!")
     
     #update
     st.subheader("Update Product")
 
     update_id = st.number_input("Enter Product ID to Update", min_value = 1, key="update_id")
+    update_sku = st.text_input("SKU", key="update_sku")
     update_name = st.text_input("Product Name",key = "update_name")
     update_category = st.text_input("Category", key="update_category")
     update_price = st.number_input("Price", min_value=0.0, key="update_price")
     update_quantity = st.number_input("Quantity", min_value=0, key="update_quantity")
+    update_reorder_level = st.number_input("Reorder Level", min_value=0, value=DEFAULT_REORDER_LEVEL, key="update_reorder_level")
 
     if st.button("Update Product"):
-        cursor.execute("""
-        UPDATE products SET name=?, category=?, price=?, quantity=? WHERE id=?""",
-        (update_name, update_category, update_price, update_quantity, update_id))
-        conn.commit()
-        st.success("Product Updated Successfully!")
+        try:
+            cursor.execute("""
+            UPDATE products SET sku=?, name=?, category=?, price=?, quantity=?, reorder_level=? WHERE id=?""",
+            (update_sku.strip() or None, update_name, update_category, update_price, int(update_quantity),
+             int(update_reorder_level), update_id))
+            conn.commit()
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            st.error("A product with this SKU already exists.")
+        else:
+            st.success("Product Updated Successfully!")
     
     #product list
     st.subheader("Product List")
 
-    products_df = pd.read_sql_query("SELECT * FROM products", conn)
+    search = st.text_input("Search products", placeholder="Type part of a product name or category")
+    products_df = search_products(conn, search)
     st.dataframe(products_df)
+    st.caption(f"Showing up to {SEARCH_LIMIT} matching products.")
 
     #delete
     if not products_df.empty:
@@ -98,88 +585,151 @@ if menu == "Manage Products":
             conn.commit()
             st.success("Product Deleted!")
 
+    #bulk catalog import / export
+    st.subheader("Bulk Catalog")
+
+    catalog = st.file_uploader("Import catalog (CSV or Parquet, upserted by SKU)", type=["csv", "parquet"])
+    if catalog is not None:
+        catalog_df = read_catalog(catalog)
+        missing = [col for col in CATALOG_COLUMNS if col not in catalog_df.columns]
+        if missing:
+            st.error("Missing columns: " + ", ".join(missing))
+        elif st.button("Import Catalog"):
+            counts = import_catalog(conn, catalog_df)
+            st.success(f"Catalog imported: {counts['inserted']} inserted, {counts['updated']} updated, "
+                       f"{counts['unchanged']} unchanged.")
+            if counts["skipped"]:
+                st.warning(f"{counts['skipped']} rows were skipped for a missing SKU, name, price or quantity.")
+
+    catalog_query = "SELECT " + ", ".join(CATALOG_COLUMNS) + " FROM products ORDER BY id"
+    col1, col2 = st.columns(2)
+    col1.download_button("Export Catalog (CSV)", lambda: export_query(catalog_query, [], "csv", CATALOG_DTYPES),
+                         "catalog.csv", "text/csv", on_click="ignore")
+    col2.download_button("Export Catalog (Parquet)", lambda: export_query(catalog_query, [], "parquet", CATALOG_DTYPES),
+                         "catalog.parquet", "application/vnd.apache.parquet", on_click="ignore")
+
 ##Sales entry system
 elif menu == "Sales Entry":
     st.subheader("Enter Sale")
 
-    products = pd.read_sql_query("SELECT * FROM products",conn)
+    total_products = cursor.execute("SELECT product_count FROM inventory_summary WHERE id = 1").fetchone()[0]
 
-    if not products.empty:
-        products['quantity'] = pd.to_numeric(products['quantity'], errors='coerce').fillna(0).astype(int)
-        products['price'] = pd.to_numeric(products['price'], errors='coerce').astype(float)
-
-        products_name = products["name"].tolist()
-        selected_product = st.selectbox("Select Product", products_name)
+    if total_products:
+        selected_product, products_name = product_picker("Select Product", "sale_product")
         quantity_sold = st.number_input("Quantity Sold", min_value=1)
 
-        if st.button("Process Sale"):
-            products_data = products[products["name"] == selected_product].iloc[0]
-            available_quantity = int(products_data["quantity"])
-
-            if quantity_sold <= available_quantity:
-                new_quantity = available_quantity - int(quantity_sold)
-                total_price = int(quantity_sold)*float(products_data["price"])
+        if "cart" not in st.session_state:
+            st.session_state.cart = []
 
-                #update stock
-                cursor.execute("""
-                UPDATE products SET quantity=? WHERE name=?""", 
-                (new_quantity, selected_product))
+        col1, col2 = st.columns(2)
+        if col1.button("Process Sale", disabled=selected_product is None):
+            total_price, low_stock = process_order(conn, [(int(selected_product), int(quantity_sold))])
 
-                #insert sale record
-                cursor.execute("""
-                INSERT INTO sales (product_name, quantity_sold, total_price, sale_date)
-                VALUES (?, ?, ?, ?)""", 
-                (selected_product, int(quantity_sold), total_price, datetime.now() .isoformat()))
-
-                conn.commit()
+            if total_price is not None:
                 st.success(f"Sale Recorded! Total ₹ {total_price}")
+                show_low_stock(low_stock)
             else:
                 st.error("Not enough stock available!")
+
+        if col2.button("Add to Cart", disabled=selected_product is None):
+            st.session_state.cart.append({"product_id": int(selected_product),
+                                          "product": products_name[selected_product],
+                                          "quantity": int(quantity_sold)})
+
+        #cart - several lines committed together in one transaction
+        def checkout():
+            total_price, low_stock = process_order(conn, [(item["product_id"], item["quantity"]) for item in st.session_state.cart])
+            st.session_state.checkout_result = (total_price, low_stock)
+            if total_price is not None:
+                st.session_state.cart = []
+
+        if "checkout_result" in st.session_state:
+            total_price, low_stock = st.session_state.pop("checkout_result")
+            if total_price is not None:
+                st.success(f"Order Recorded! Total ₹ {total_price}")
+                show_low_stock(low_stock)
+            else:
+                st.error("Not enough stock for one or more items. Nothing was sold.")
+
+        if st.session_state.cart:
+            st.subheader("Cart")
+            st.dataframe(pd.DataFrame(st.session_state.cart)[["product", "quantity"]])
+
+            col1, col2 = st.columns(2)
+            col1.button("Checkout", on_click=checkout)
+            col2.button("Clear Cart", on_click=st.session_state.cart.clear)
     else:
         st.warning("No products available.")
 
-#View sales
+#View sales - one page of records per rerun, exports are built only when downloaded
 elif menu == "View Sales":
     st.subheader("View Sales")
 
-    sales_df = pd.read_sql_query("SELECT * FROM sales", conn)
-    st.dataframe(sales_df)
-        
+    col1, col2 = st.columns(2)
+    date_range = col1.date_input("Sale date range", value=[])
+    with col2:
+        product_id, _ = product_picker("Product", "sales_product", all_label="All products")
+    where, params = sales_filter(date_range, product_id)
+
     st.subheader("Sales Summary")
 
-    sales_summery = pd.read_sql_query("""
-    SELECT product_name, SUM(quantity_sold) AS total_quantity_sold, 
-    SUM(total_price) AS total_sales
-    FROM sales
-    GROUP BY product_name """, conn)
+    sales_summery = load_sales_summary(conn, date_range, product_id)
+    products_name = dict(cursor.execute("SELECT id, name FROM products WHERE id IN (SELECT value FROM json_each(?))",
+                                        (json.dumps(sales_summery["product_id"].dropna().astype(int).tolist()),)).fetchall())
+    sales_summery["product_name"] = [products_name.get(i, name) for i, name in
+                                     zip(sales_summery.pop("product_id"), sales_summery["product_name"])]
 
     if not sales_summery.empty:
         st.dataframe(sales_summery)
     else:
         st.info("No sales data available.")
 
-    csv = sales_summery.to_csv(index=False).encode("utf-8")
     st.download_button(
         "Download Sales Summary Data",
-        csv,
+        lambda: sales_summery.to_csv(index=False).encode("utf-8"),
         "sales_summary.csv",
         "text/csv",
-        key="download_csv"
+        key="download_csv",
+        on_click="ignore"
     )
 
     st.subheader("Sales Records")
 
-    sales_df = pd.read_sql_query("SELECT * FROM sales", conn)
+    filters = (tuple(date_range), product_id)
+    if st.session_state.get("sales_filters") != filters:
+        st.session_state.sales_filters = filters
+        st.session_state.sales_pages = [0]
+
+    page_where, page_params = sales_filter(date_range, product_id, after_id=st.session_state.sales_pages[-1])
+    sales_df = pd.read_sql_query(SALES_QUERY + f"{page_where} ORDER BY s.id LIMIT ?",
+                                 conn, params=page_params + [SALES_PAGE_SIZE + 1])
+    has_next = len(sales_df) > SALES_PAGE_SIZE
+    sales_df = sales_df.head(SALES_PAGE_SIZE)
 
     if not sales_df.empty:
-        st.dataframe(sales_df)
+        st.dataframe(sales_df, hide_index=True)
+
+        col1, col2, col3 = st.columns([1, 1, 4])
+        col1.button("Previous", disabled=len(st.session_state.sales_pages) == 1,
+                    on_click=lambda: st.session_state.sales_pages.pop())
+        col2.button("Next", disabled=not has_next, on_click=st.session_state.sales_pages.append,
+                    args=(int(sales_df["id"].iloc[-1]),))
+        col3.caption(f"Page {len(st.session_state.sales_pages)}")
 
-        csv = sales_df.to_csv(index=False).encode("utf-8")
-        st.download_button(
+        col1, col2 = st.columns(2)
+        col1.download_button(
             "Download Sales Data",
-            data=csv,
+            data=lambda: export_query(SALES_QUERY + f"{where} ORDER BY s.id", params, "csv", SALES_DTYPES),
             file_name="sales_report.csv",
-            mime="text/csv"
+            mime="text/csv",
+            on_click="ignore"
+        )
+        col2.download_button(
+            "Download Sales Data (Parquet)",
+            data=lambda: export_query(SALES_QUERY + f"{where} ORDER BY s.id", params, "parquet", SALES_DTYPES),
+            file_name="sales_report.parquet",
+            mime="application/vnd.apache.parquet",
+            on_click="ignore"
         )
     else:
         st.info("No sales recorded yet.")
@@ -189,23 +739,33 @@ elif menu == "View Sales":
 elif menu == "Dashboard":
     st.subheader("Inventory Dashboard")
 
-    total_products = cursor.execute("SELECT COUNT(*) FROM products").fetchone()[0]
-    total_sales = cursor.execute("SELECT SUM(total_price) FROM sales").fetchone()[0]
+    total_products, total_sales, units_sold = cursor.execute(
+        "SELECT product_count, total_revenue, units_sold FROM inventory_summary WHERE id = 1").fetchone()
 
-    col1,col2 = st.columns(2)
+    col1,col2,col3 = st.columns(3)
     col1.metric("Total Products", total_products)
     col2.metric("Total Sales ₹", total_sales)
-
-    df = pd.read_sql_query("SELECT name, quantity FROM products",conn)
-
-    if not df.empty:
-        st.subheader("Current Stock Levels")
-        st.bar_chart(df.set_index("name"))
+    col3.metric("Units Sold", units_sold)
+
+    category_df = pd.read_sql_query("""
+    SELECT CASE category WHEN '' THEN 'Uncategorized' ELSE category END AS category, quantity
+    FROM category_stock WHERE product_count > 0 ORDER BY quantity DESC""", conn)
+
+    if not category_df.empty:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Stock by Category")
+            st.bar_chart(category_df.set_index("category"))
+        with col2:
+            st.subheader(f"Top {TOP_STOCK_PRODUCTS} Products by Stock")
+            df = pd.read_sql_query("SELECT name, quantity FROM products ORDER BY quantity DESC LIMIT ?",
+                                   conn, params=(TOP_STOCK_PRODUCTS,))
+            st.bar_chart(df.set_index("name"))
     else:
         st.info("No products available.")
 
     low_stock_products = pd.read_sql_query(
-    "SELECT * FROM products WHERE CAST(quantity AS INTEGER) <= 10",
+    "SELECT * FROM products WHERE quantity <= reorder_level",
     conn
 )
 
@@ -214,3 +774,5 @@ elif menu == "Dashboard":
         st.dataframe(low_stock_products)
     else:
         st.info("Stocks are Avalilable")
+
+profiling.render_panel()
@@ -0,0 +1,414 @@
+#Benchmark suite for the four apps
+
+#Every hot path is timed headlessly through Streamlit's AppTest against deterministic synthetic data.
+#Each app and size runs in its own worker process and scratch directory, so caches, connections
+#and memory never leak from one case into the next.
+#
+#  python benchmark.py                                   #all apps at 1e3, 1e4 and 1e5 rows
+#  python benchmark.py --apps app3 --sizes 1e3,1e7       #selected apps and sizes
+#  python benchmark.py --compare old.json new.json       #exits with status 1 on a regression
+
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILES = {'app1': 'app1.py', 'app2': 'app2.py', 'app3': 'app3.py', 'lifestyle': 'AI-Lifestyle.py'}
+SHARED_MODULES = ['profiling.py']
+DEFAULT_SIZES = '1e3,1e4,1e5'
+DEFAULT_REPORT = 'benchmark_report.json'
+SEED = 2024
+WRITE_CHUNK_ROWS = 500_000
+APPTEST_TIMEOUT_S = 3600
+REGRESSION_THRESHOLD = 1.2
+#timings below this are mostly noise and never count as a regression
+MIN_COMPARE_SECONDS = 0.05
+CART_ITEMS = 10
+
+CATEGORIES = ['Food', 'Rent', 'Travel', 'Utilities', 'Shopping', 'Health', 'Entertainment', 'Education']
+PRODUCT_WORDS = ['Widget', 'Gadget', 'Bolt', 'Cable', 'Lamp', 'Chair', 'Notebook', 'Bottle', 'Filter', 'Sensor']
+START_DATE = date(2015, 1, 1)
+
+#data generators - seeded, written in chunks so 1e7 rows never have to fit in one frame
+def chunk_sizes(n_rows):
+    for start in range(0, n_rows, WRITE_CHUNK_ROWS):
+        yield start, min(WRITE_CHUNK_ROWS, n_rows - start)
+
+def random_dates(rng, size, days=3650, start=START_DATE):
+    offsets = rng.integers(0, days, size)
+    return (np.datetime64(start) + offsets.astype('timedelta64[D]')).astype(str)
+
+def expense_frames(n_rows, rng):
+    for _, size in chunk_sizes(n_rows):
+        yield pd.DataFrame({
+            'Date': random_dates(rng, size),
+            'Category': rng.choice(CATEGORIES, size),
+            'Amount': rng.gamma(2.0, 40.0, size).round(2),
+        })
+
+def registration_frames(n_rows, n_events, rng):
+    for start, size in chunk_sizes(n_rows):
+        ids = np.arange(start, start + size)
+        yield pd.DataFrame({
+            'name': [f'Participant {i}' for i in ids],
+            'email': [f'user{i}@example.com' for i in ids],
+            'phone': rng.integers(6_000_000_000, 9_999_999_999, size).astype(str),
+            'event_id': rng.integers(1, n_events + 1, size),
+            'year': rng.integers(1, 6, size),
+        })
+
+def catalog_frames(n_rows, rng):
+    for start, size in chunk_sizes(n_rows):
+        ids = np.arange(start, start + size)
+        words = rng.choice(PRODUCT_WORDS, size)
+        yield pd.DataFrame({
+            'sku': [f'SKU-{i:08d}' for i in ids],
+            'name': [f'{word} {i}' for word, i in zip(words, ids)],
+            'category': rng.choice(CATEGORIES, size),
+            'price': rng.uniform(1, 500, size).round(2),
+            'quantity': rng.integers(0, 500, size),
+            'reorder_level': rng.integers(5, 20, size),
+        })
+
+def sales_rows(n_rows, n_products, rng):
+    for _, size in chunk_sizes(n_rows):
+        product_ids = rng.integers(1, n_products + 1, size)
+        quantities = rng.integers(1, 6, size)
+        prices = rng.uniform(1, 500, size).round(2)
+        sale_dates = random_dates(rng, size, days=730, start=date.today() - timedelta(days=730))
+        yield list(zip(product_ids.tolist(), [f'Product {i}' for i in product_ids],
+                       quantities.tolist(), (quantities * prices).round(2).tolist(), sale_dates.tolist()))
+
+def lifestyle_frames(n_rows, rng):
+    for _, size in chunk_sizes(n_rows):
+        df = pd.DataFrame({
+            'sleep_hours': rng.choice(np.arange(3.0, 10.5, 0.5), size),
+            'steps': rng.integers(0, 30, size) * 1000,
+            'workout_intensity': rng.integers(0, 4, size),
+            'junk_food_level': rng.integers(1, 4, size),
+            'screen_time': rng.choice(np.arange(1.0, 12.5, 0.5), size),
+            'stress_level': rng.integers(1, 11, size),
+        })
+        score = (40 + 5 * df['sleep_hours'] + df['steps'] / 1000 + 3 * df['workout_intensity']
+                 - 4 * df['junk_food_level'] - 1.5 * df['screen_time'] - 2 * df['stress_level']
+                 + rng.normal(0, 5, size))
+        df['energy_score'] = score.clip(0, 100).round().astype(int)
+        yield df
+
+def write_csv(path, frames):
+    for i, df in enumerate(frames):
+        df.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+
+def upload(path):
+    with open(path, 'rb') as f:
+        return os.path.basename(path), f.read(), 'text/csv'
+
+#AppTest helpers
+def timed(results, case, fn, detail=None):
+    start = time.perf_counter()
+    fn()
+    results.append({'case': case, 'seconds': time.perf_counter() - start, 'detail': detail})
+
+def check(at):
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return at
+
+def run(at):
+    return check(at.run())
+
+def widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+#a click on a download button runs its deferred callable on the server; the test runtime is torn
+#down after every run, so the callables are recorded as they are registered and invoked from here
+DEFERRED_DOWNLOADS = {}
+
+def record_deferred_downloads():
+    from streamlit.runtime.media_file_manager import MediaFileManager
+
+    add_deferred = MediaFileManager.add_deferred
+    def add_and_record(self, data_callable, *args, **kwargs):
+        file_id = add_deferred(self, data_callable, *args, **kwargs)
+        DEFERRED_DOWNLOADS[file_id] = data_callable
+        return file_id
+    MediaFileManager.add_deferred = add_and_record
+
+def download(at, label):
+    button = widget(at.get('download_button'), label)
+    data = DEFERRED_DOWNLOADS[button.proto.deferred_file_id]()
+    if hasattr(data, 'read'):
+        data.read()
+        data.close()
+
+def new_app(app):
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(APP_FILES[app], default_timeout=APPTEST_TIMEOUT_S)
+
+#per-app hot paths, each runs inside a scratch directory holding a copy of the app
+def bench_app1(n_rows, rng):
+    results = []
+    write_csv('expenses.csv', expense_frames(n_rows, rng))
+
+    at = new_app('app1')
+    timed(results, 'first_render', lambda: run(at))
+    at.text_input[0].input('admin')
+    at.text_input[1].input('1234')
+    widget(at.button, 'Login').click()
+    run(at)
+
+    at.get('file_uploader')[0].set_value(upload('expenses.csv'))
+    timed(results, 'upload_parse_import', lambda: run(at))
+    timed(results, 'upload_rerun_cached', lambda: run(at))
+
+    at.get('file_uploader')[0].set_value(None)
+    timed(results, 'dashboard_render', lambda: run(at))
+    widget(at.button, 'Next').click()
+    timed(results, 'past_uploads_next_page', lambda: run(at))
+    return results
+
+def bench_app2(n_rows, rng):
+    results = []
+    n_events = max(10, n_rows // 1000)
+    write_csv('registrations.csv', registration_frames(n_rows, n_events, rng))
+
+    at = new_app('app2')
+    timed(results, 'first_render', lambda: run(at))
+    #the schema is created on first database use, which the landing page does not make
+    at.sidebar.selectbox[0].set_value('View Events')
+    run(at)
+    with sqlite3.connect('event.db') as conn:
+        conn.executemany('INSERT INTO events (name, date, time, location) VALUES (?, ?, ?, ?)',
+                         [(f'Event {i}', '2026-06-01', '10:00', f'Hall {i % 20}') for i in range(1, n_events + 1)])
+
+    at.sidebar.selectbox[0].set_value('Register Participant')
+    run(at)
+    at.radio[0].set_value('Bulk CSV')
+    run(at)
+    at.get('file_uploader')[0].set_value(upload('registrations.csv'))
+    timed(results, 'bulk_register_read', lambda: run(at))
+    widget(at.button, 'Import').click()
+    timed(results, 'bulk_register_import', lambda: run(at))
+
+    for case, page in [('view_events', 'View Events'), ('view_participants', 'View Participants'),
+                       ('view_stats', 'View Statistics'), ('export_page_render', 'Export Participants')]:
+        at.sidebar.selectbox[0].set_value(page)
+        timed(results, case, lambda: run(at))
+    timed(results, 'export_participants_csv', lambda: download(at, 'Download CSV'))
+    return results
+
+def bench_app3(n_rows, rng):
+    results = []
+    n_products = max(100, n_rows // 10)
+    write_csv('catalog.csv', catalog_frames(n_products, rng))
+
+    at = new_app('app3')
+    timed(results, 'first_render', lambda: run(at))
+    at.get('file_uploader')[0].set_value(upload('catalog.csv'))
+    run(at)
+    widget(at.button, 'Import Catalog').click()
+    timed(results, 'catalog_import', lambda: run(at), f'{n_products} products')
+    widget(at.button, 'Import Catalog').click()
+    timed(results, 'catalog_reimport_unchanged', lambda: run(at), f'{n_products} products')
+    at.get('file_uploader')[0].set_value(None)
+    run(at)
+    widget(at.text_input, 'Search products').input('Widget')
+    timed(results, 'product_search', lambda: run(at))
+    timed(results, 'export_catalog_parquet', lambda: download(at, 'Export Catalog (Parquet)'))
+
+    with sqlite3.connect('inventory.db') as conn:
+        for rows in sales_rows(n_rows, n_products, rng):
+            conn.executemany('INSERT INTO sales (product_id, product_name, quantity_sold, total_price, sale_date) '
+                             'VALUES (?, ?, ?, ?, ?)', rows)
+
+    at.sidebar.selectbox[0].set_value('Sales Entry')
+    timed(results, 'sales_entry_render', lambda: run(at))
+    widget(at.button, 'Process Sale').click()
+    timed(results, 'process_sale', lambda: run(at))
+    for _ in range(CART_ITEMS):
+        widget(at.button, 'Add to Cart').click()
+        run(at)
+    widget(at.button, 'Checkout').click()
+    timed(results, 'checkout_cart', lambda: run(at), f'{CART_ITEMS} items')
+
+    at.sidebar.selectbox[0].set_value('View Sales')
+    timed(results, 'view_sales_render', lambda: run(at))
+    timed(results, 'view_sales_rerun', lambda: run(at))
+    timed(results, 'export_sales_csv', lambda: download(at, 'Download Sales Data'))
+    timed(results, 'export_sales_parquet', lambda: download(at, 'Download Sales Data (Parquet)'))
+
+    at.sidebar.selectbox[0].set_value('Dashboard')
+    timed(results, 'dashboard_render', lambda: run(at))
+    return results
+
+def bench_lifestyle(n_rows, rng):
+    results = []
+    write_csv('history.csv', lifestyle_frames(n_rows, rng))
+
+    #the first run creates the log schema, its model is then dropped so the fit below sees the seeded log
+    run(new_app('lifestyle'))
+    shutil.rmtree('model_store')
+    with sqlite3.connect('lifestyle_log.db') as conn:
+        for df in lifestyle_frames(n_rows, rng):
+            df.insert(0, 'date', random_dates(rng, len(df), days=1095, start=date.today() - timedelta(days=1094)))
+            #synthetic scores stand in for scores the user reported, so the fit learns from them
+            df['self_reported'] = 1
+            conn.executemany(f"INSERT INTO lifestyle_log ({', '.join(df.columns)}) VALUES ({', '.join('?' * len(df.columns))})",
+                             df.itertuples(index=False, name=None))
+
+    at = new_app('lifestyle')
+    timed(results, 'model_fit_first_render', lambda: run(at))
+    widget(at.button, 'Predict Energy').click()
+    timed(results, 'predict_single', lambda: run(at))
+    widget(at.number_input, 'Your actual energy score today (0-100)').set_value(70)
+    widget(at.button, "Save Today's Data").click()
+    timed(results, 'save_today', lambda: run(at))
+    at.radio[-1].set_value('Last 30 Days')
+    timed(results, 'trend_last_30_days', lambda: run(at))
+
+    grid_steps = min(1000, max(2, math.isqrt(n_rows)))
+    widget(at.number_input, 'X steps').set_value(grid_steps)
+    widget(at.number_input, 'Y steps').set_value(grid_steps)
+    widget(at.button, 'Run what-if sweep').click()
+    timed(results, 'what_if_grid', lambda: run(at), f'{grid_steps}x{grid_steps} grid')
+
+    widget(at.radio, 'Batch source').set_value('Upload CSV')
+    run(at)
+    at.get('file_uploader')[0].set_value(upload('history.csv'))
+    timed(results, 'batch_predict_upload', lambda: run(at))
+    return results
+
+BENCHMARKS = {'app1': bench_app1, 'app2': bench_app2, 'app3': bench_app3, 'lifestyle': bench_lifestyle}
+
+def run_worker(app, n_rows, output):
+    record_deferred_downloads()
+    results = BENCHMARKS[app](n_rows, np.random.default_rng([SEED, n_rows]))
+    with open(output, 'w') as f:
+        json.dump(results, f)
+
+#driver - one subprocess per app, size and repeat
+def run_case(app, n_rows):
+    with tempfile.TemporaryDirectory(prefix=f'bench-{app}-') as workdir:
+        for file_name in [APP_FILES[app]] + SHARED_MODULES:
+            shutil.copy(os.path.join(REPO_DIR, file_name), workdir)
+        output = os.path.join(workdir, 'results.json')
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', app, str(n_rows), output],
+                              cwd=workdir, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f'{app} at {n_rows} rows failed:\n{proc.stderr[-4000:]}')
+        with open(output) as f:
+            return json.load(f)
+
+def git_commit():
+    proc = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+def package_versions():
+    from importlib.metadata import version, PackageNotFoundError
+
+    versions = {}
+    for package in ['streamlit', 'pandas', 'numpy', 'scikit-learn', 'pyarrow']:
+        try:
+            versions[package] = version(package)
+        except PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+def run_suite(apps, sizes, repeat):
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'packages': package_versions(),
+            'seed': SEED,
+            'repeat': repeat,
+        },
+        'results': [],
+    }
+    for app in apps:
+        for n_rows in sizes:
+            runs, details = {}, {}
+            for _ in range(repeat):
+                for result in run_case(app, n_rows):
+                    runs.setdefault(result['case'], []).append(result['seconds'])
+                    details[result['case']] = result['detail']
+            for case, seconds in runs.items():
+                report['results'].append({'app': app, 'case': case, 'rows': n_rows, 'detail': details[case],
+                                          'seconds': statistics.median(seconds), 'runs': seconds})
+                print(f'{app:<10} {case:<36} {n_rows:>10,} {statistics.median(seconds):>10.3f}s', flush=True)
+    return report
+
+def compare(old_path, new_path, threshold):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    baseline = {(r['app'], r['case'], r['rows']): r['seconds'] for r in old['results']}
+
+    print(f"{old['meta'].get('git_commit')} -> {new['meta'].get('git_commit')}")
+    regressions = 0
+    for r in new['results']:
+        before = baseline.get((r['app'], r['case'], r['rows']))
+        if before is None:
+            print(f"{r['app']:<10} {r['case']:<36} {r['rows']:>10,}        new {r['seconds']:>10.3f}s")
+            continue
+        ratio = r['seconds'] / before if before else float('inf')
+        regressed = ratio > threshold and r['seconds'] >= MIN_COMPARE_SECONDS
+        regressions += regressed
+        print(f"{r['app']:<10} {r['case']:<36} {r['rows']:>10,} {before:>10.3f}s {r['seconds']:>10.3f}s "
+              f"{ratio:>6.2f}x{'  REGRESSION' if regressed else ''}")
+    print(f'{regressions} regression(s) above {threshold:.2f}x')
+    return regressions
+
+def parse_sizes(text):
+    return [int(float(size)) for size in text.split(',') if size.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the apps headlessly on synthetic data.')
+    parser.add_argument('--apps', default=','.join(APP_FILES), help='comma separated, from: ' + ', '.join(APP_FILES))
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma separated row counts, e.g. 1e3,1e5,1e7')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per case, the median is reported')
+    parser.add_argument('--output', default=DEFAULT_REPORT)
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two reports instead of running')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='slowdown ratio reported as a regression')
+    parser.add_argument('--worker', nargs=3, metavar=('APP', 'ROWS', 'OUTPUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        app, n_rows, output = args.worker
+        run_worker(app, int(n_rows), output)
+        return 0
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+
+    apps = [app.strip() for app in args.apps.split(',') if app.strip()]
+    unknown = [app for app in apps if app not in APP_FILES]
+    if unknown:
+        parser.error('unknown apps: ' + ', '.join(unknown))
+    report = run_suite(apps, parse_sizes(args.sizes), args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Report written to {args.output}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#Catalog import checks for app3.py
+
+#Runs app3's read_catalog and import_catalog, taken from the app source, against scratch databases
+#built the way the app builds them, and checks which products the imports leave behind.
+#Exits with status 1 if any check fails.
+#
+#  python check_catalog_import.py
+
+
+import ast
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = 'app3.py'
+
+#imports, constants and functions of the app, without running its page
+def load_app():
+    with open(os.path.join(REPO_DIR, APP_FILE)) as f:
+        source = f.read()
+    body = [node for node in ast.parse(source).body
+            if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef))
+            or isinstance(node, ast.Assign) and all(isinstance(t, ast.Name) and t.id.isupper() for t in node.targets)]
+    sys.path.insert(0, REPO_DIR)
+    namespace = {}
+    exec(compile(ast.Module(body=body, type_ignores=[]), APP_FILE, 'exec'), namespace)
+    return namespace
+
+#the tables as the app created them before any migration, then migrated to the current schema
+def create_database(app, path, legacy_products=()):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE products (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, category TEXT, price REAL, quantity INTEGER)')
+    conn.execute('CREATE TABLE sales (id INTEGER PRIMARY KEY AUTOINCREMENT, product_name TEXT, quantity_sold INTEGER, total_price REAL, sale_date TEXT)')
+    conn.executemany('INSERT INTO products (name, category, price, quantity) VALUES (?, ?, ?, ?)', legacy_products)
+    conn.commit()
+    app['migrate'](conn)
+    return conn
+
+def upload(text, name='catalog.csv'):
+    file = io.BytesIO(text.encode())
+    file.name = name
+    return file
+
+def import_csv(app, conn, text):
+    return app['import_catalog'](conn, app['read_catalog'](upload(text)))
+
+def products(conn):
+    return conn.execute('SELECT sku, name, price, quantity FROM products ORDER BY id').fetchall()
+
+#headers are matched case-insensitively, and SKUs are text - leading zeros survive even with a blank SKU cell
+def check_uppercase_headers(app, workdir, failures):
+    conn = create_database(app, os.path.join(workdir, 'headers.db'))
+    counts = import_csv(app, conn, 'SKU,Name,Category,Price,Quantity\n00123,Lamp,Home,10,5\n,Blank,Home,1,1\n')
+    if counts != {'inserted': 1, 'updated': 0, 'unchanged': 0, 'skipped': 1}:
+        failures.append(f'first import with a SKU header counted {counts}')
+    counts = import_csv(app, conn, 'SKU,Name,Category,Price,Quantity\n00123,Lamp,Home,12,5\n')
+    if counts != {'inserted': 0, 'updated': 1, 'unchanged': 0, 'skipped': 0}:
+        failures.append(f're-import of SKU 00123 counted {counts}')
+    if products(conn) != [('00123', 'Lamp', 12.0, 5)]:
+        failures.append(f'SKU 00123 was not updated in place: {products(conn)}')
+    conn.close()
+
+#products from before migration 5 have no SKU; the first import claims them by name instead of duplicating them
+def check_pre_sku_database(app, workdir, failures):
+    conn = create_database(app, os.path.join(workdir, 'pre_sku.db'), [
+        ('Lamp', 'Home', 10.0, 5), ('Chair', 'Home', 40.0, 2), ('Lamp', 'Home', 10.0, 1), ('Desk', 'Office', 90.0, 1)])
+    catalog = 'sku,name,category,price,quantity\nSKU-1,Lamp,Home,15,5\nSKU-2,Chair,Home,40,2\nSKU-3,Stool,Home,25,4\n'
+    counts = import_csv(app, conn, catalog)
+    if counts != {'inserted': 1, 'updated': 1, 'unchanged': 1, 'skipped': 0}:
+        failures.append(f'first import over a pre-SKU database counted {counts}')
+    expected = [('SKU-1', 'Lamp', 15.0, 5), ('SKU-2', 'Chair', 40.0, 2), (None, 'Lamp', 10.0, 1),
+                (None, 'Desk', 90.0, 1), ('SKU-3', 'Stool', 25.0, 4)]
+    if products(conn) != expected:
+        failures.append(f'pre-SKU products after import: {products(conn)}')
+    product_count = conn.execute('SELECT product_count FROM inventory_summary WHERE id = 1').fetchone()[0]
+    if product_count != len(expected):
+        failures.append(f'dashboard product count {product_count} != {len(expected)} products')
+    counts = import_csv(app, conn, catalog)
+    if counts != {'inserted': 0, 'updated': 0, 'unchanged': 3, 'skipped': 0}:
+        failures.append(f'second import over a pre-SKU database counted {counts}')
+    conn.close()
+
+CHECKS = [check_uppercase_headers, check_pre_sku_database]
+
+def main():
+    app = load_app()
+    failures = []
+    with tempfile.TemporaryDirectory(prefix='check-catalog-') as workdir:
+        for check in CHECKS:
+            before = len(failures)
+            check(app, workdir, failures)
+            print(f"{'ok  ' if len(failures) == before else 'FAIL'} {check.__name__}")
+    for failure in failures:
+        print('FAIL ' + failure)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#Concurrent sales load test for app3.py
+
+#Many threads, each on its own connection like separate sessions, place random multi-item orders
+#through app3's process_order against more demand than there is stock. Afterwards the stock, sales,
+#sales summary and dashboard KPIs must add up exactly: no product below zero, no sale without its
+#stock decrement and no lost update. Exits with status 1 if any check fails.
+#
+#  python loadtest_sales.py
+#  python loadtest_sales.py --threads 32 --orders 1000 --products 10 --stock 500
+
+
+import argparse
+import ast
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = 'app3.py'
+SHARED_MODULES = ['profiling.py']
+BUSY_TIMEOUT_S = 30
+SEED = 2024
+
+#process_order is taken from the app source as is, the rest of the script is not executed
+def load_process_order():
+    with open(os.path.join(REPO_DIR, APP_FILE)) as f:
+        source = f.read()
+    node = next(n for n in ast.parse(source).body if isinstance(n, ast.FunctionDef) and n.name == 'process_order')
+    namespace = {'datetime': datetime}
+    exec(ast.get_source_segment(source, node), namespace)
+    return namespace['process_order']
+
+#one headless run of the app creates the real schema, migrations and KPI triggers
+def create_database(workdir):
+    from streamlit.testing.v1 import AppTest
+
+    for file_name in [APP_FILE] + SHARED_MODULES:
+        shutil.copy(os.path.join(REPO_DIR, file_name), workdir)
+    at = AppTest.from_file(APP_FILE, default_timeout=120).run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return os.path.join(workdir, 'inventory.db')
+
+def seed_products(db_path, n_products, stock):
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            'INSERT INTO products (sku, name, category, price, quantity, reorder_level) VALUES (?, ?, ?, ?, ?, ?)',
+            [(f'LOAD-{i}', f'Load product {i}', 'Load', 2.5 + i, stock, 0) for i in range(1, n_products + 1)])
+        return [row[0] for row in conn.execute('SELECT id FROM products ORDER BY id')]
+
+def run_load(db_path, process_order, product_ids, n_threads, n_orders, cart_size):
+    accepted, rejected, errors = [], [0], []
+    lock = threading.Lock()
+
+    def session(worker):
+        rng = random.Random(SEED + worker)
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_S, check_same_thread=False)
+        try:
+            for _ in range(n_orders):
+                items = [(rng.choice(product_ids), rng.randint(1, 3)) for _ in range(rng.randint(1, cart_size))]
+                total, _ = process_order(conn, items)
+                with lock:
+                    if total is None:
+                        rejected[0] += 1
+                    else:
+                        accepted.append((items, total))
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(n_threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return accepted, rejected[0], errors, time.perf_counter() - started
+
+def check_invariants(db_path, product_ids, stock, accepted):
+    expected_sold = {product_id: 0 for product_id in product_ids}
+    for items, _ in accepted:
+        for product_id, quantity in items:
+            expected_sold[product_id] += quantity
+
+    failures = []
+    with sqlite3.connect(db_path) as conn:
+        remaining = dict(conn.execute('SELECT id, quantity FROM products'))
+        sold = dict(conn.execute('SELECT product_id, SUM(quantity_sold) FROM sales GROUP BY product_id'))
+        summary = dict(conn.execute('SELECT product_key, quantity_sold FROM product_sales'))
+        revenue, units = conn.execute('SELECT COALESCE(SUM(total_price), 0), COALESCE(SUM(quantity_sold), 0) FROM sales').fetchone()
+        kpi_revenue, kpi_units = conn.execute('SELECT total_revenue, units_sold FROM inventory_summary WHERE id = 1').fetchone()
+
+    for product_id in product_ids:
+        if remaining[product_id] < 0:
+            failures.append(f'product {product_id} oversold: quantity {remaining[product_id]}')
+        if sold.get(product_id, 0) != expected_sold[product_id]:
+            failures.append(f'product {product_id}: {sold.get(product_id, 0)} units in sales, {expected_sold[product_id]} accepted')
+        if summary.get(product_id, 0) != expected_sold[product_id]:
+            failures.append(f'product {product_id}: sales summary shows {summary.get(product_id, 0)} units, {expected_sold[product_id]} accepted')
+        if remaining[product_id] + expected_sold[product_id] != stock:
+            failures.append(f'product {product_id}: {remaining[product_id]} left + {expected_sold[product_id]} sold != {stock} stocked')
+    if abs(revenue - sum(total for _, total in accepted)) > 1e-6:
+        failures.append(f'sales revenue {revenue} != accepted order totals {sum(total for _, total in accepted)}')
+    if kpi_units != units or abs(kpi_revenue - revenue) > 1e-6:
+        failures.append(f'dashboard KPIs ({kpi_units} units, {kpi_revenue}) != sales ({units} units, {revenue})')
+    return failures, remaining
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammer app3's process_order from concurrent sessions.")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--orders', type=int, default=400, help='orders per thread')
+    parser.add_argument('--products', type=int, default=5)
+    parser.add_argument('--stock', type=int, default=2000, help='starting quantity of every product')
+    parser.add_argument('--cart-size', type=int, default=3, help='most line items in one order')
+    args = parser.parse_args()
+
+    process_order = load_process_order()
+    with tempfile.TemporaryDirectory(prefix='loadtest-sales-') as workdir:
+        os.chdir(workdir)
+        db_path = create_database(workdir)
+        product_ids = seed_products(db_path, args.products, args.stock)
+        accepted, rejected, errors, seconds = run_load(db_path, process_order, product_ids,
+                                                      args.threads, args.orders, args.cart_size)
+        failures, remaining = check_invariants(db_path, product_ids, args.stock, accepted)
+        os.chdir(REPO_DIR)
+
+    attempts = args.threads * args.orders
+    print(f'{attempts:,} orders from {args.threads} sessions in {seconds:.2f}s ({attempts / seconds:,.0f} orders/s)')
+    print(f'{len(accepted):,} accepted, {rejected:,} rejected for stock, {len(errors)} errors')
+    print('remaining stock: ' + ', '.join(f'#{i}: {q}' for i, q in sorted(remaining.items())))
+    for error in errors:
+        print('ERROR ' + error)
+    for failure in failures:
+        print('FAIL ' + failure)
+    if errors or failures:
+        return 1
+    print('OK - no oversell, no lost updates, KPIs consistent')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+#Profiling shared by the apps
+
+#Times database calls and render sections for the current rerun when the sidebar toggle is on.
+#Connections opened with factory=profiling.Connection record every statement (wall time, rows
+#fetched and an estimate of the payload size); mark() and section() time the parts of the page.
+#Statements slower than SLOW_QUERY_S go to a slow-query log, and totals per query and section are
+#aggregated across reruns so they can be downloaded for offline analysis.
+#
+#  profiling.start_run('app3')            #top of the script, renders the toggle
+#  profiling.mark('Dashboard')            #starts a top-level section, ending the previous one
+#  with profiling.section('Build chart'): #times a nested block
+#  profiling.render_panel()               #end of the script, draws the waterfall
+
+
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+SLOW_QUERY_S = 0.1
+SLOW_LOG_SIZE = 200
+QUERY_LABEL_CHARS = 80
+
+#the run being profiled on this thread, None when profiling is off
+current_run = ContextVar('profiling_run', default=None)
+
+@st.cache_resource
+def profile_store():
+    return {'lock': threading.Lock(), 'slow_queries': deque(maxlen=SLOW_LOG_SIZE), 'totals': {}}
+
+def start_run(app):
+    enabled = st.sidebar.toggle('Profile reruns', key='profiling_enabled',
+                                help='Time queries and page sections for each rerun.')
+    if not enabled:
+        current_run.set(None)
+        return
+    current_run.set({'app': app, 'started': time.perf_counter(), 'spans': [], 'open_mark': None})
+
+def begin_span(run, kind, name, query=None):
+    span = {'kind': kind, 'name': name, 'start': time.perf_counter() - run['started'],
+            'seconds': 0.0, 'rows': 0, 'bytes': 0, 'query': query}
+    run['spans'].append(span)
+    return span
+
+def add_time(run, span, seconds):
+    span['seconds'] += seconds
+    if span['kind'] == 'query' and span['seconds'] >= SLOW_QUERY_S and not span.get('slow'):
+        span['slow'] = True
+        span['app'] = run['app']
+        span['logged_at'] = datetime.now().isoformat(timespec='seconds')
+        store = profile_store()
+        with store['lock']:
+            #the logged span is the live one, so time spent fetching afterwards still shows up
+            store['slow_queries'].append(span)
+
+def mark(name):
+    run = current_run.get()
+    if run is None:
+        return
+    end_mark(run)
+    run['open_mark'] = (begin_span(run, 'section', name), time.perf_counter())
+
+def end_mark(run):
+    if run['open_mark'] is not None:
+        span, started = run['open_mark']
+        add_time(run, span, time.perf_counter() - started)
+        run['open_mark'] = None
+
+@contextmanager
+def section(name):
+    run = current_run.get()
+    if run is None:
+        yield
+        return
+    span = begin_span(run, 'section', name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(run, span, time.perf_counter() - started)
+
+#database instrumentation - only cursors created while a run is profiled pay for the bookkeeping
+def query_label(sql):
+    text = ' '.join(sql.split())
+    return text if len(text) <= QUERY_LABEL_CHARS else text[:QUERY_LABEL_CHARS - 3] + '...'
+
+def payload_bytes(rows):
+    return sum(len(v) if isinstance(v, (str, bytes)) else 8 for row in rows for v in row)
+
+class Cursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        return self.timed_execute(sql, super().execute, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.timed_execute(sql, super().executemany, seq_of_parameters)
+
+    def timed_execute(self, sql, execute, parameters):
+        run = current_run.get()
+        if run is None:
+            self.span = None
+            return execute(sql, parameters)
+        self.run = run
+        self.span = begin_span(run, 'query', query_label(sql), ' '.join(sql.split()))
+        started = time.perf_counter()
+        try:
+            return execute(sql, parameters)
+        finally:
+            add_time(run, self.span, time.perf_counter() - started)
+            if self.description is None and self.rowcount > 0:
+                self.span['rows'] += self.rowcount
+
+    def timed_fetch(self, fetch, single, *args):
+        span = getattr(self, 'span', None)
+        if span is None:
+            return fetch(*args)
+        started = time.perf_counter()
+        result = fetch(*args)
+        add_time(self.run, span, time.perf_counter() - started)
+        rows = ([] if result is None else [result]) if single else result
+        span['rows'] += len(rows)
+        span['bytes'] += payload_bytes(rows)
+        return result
+
+    def fetchone(self):
+        return self.timed_fetch(super().fetchone, True)
+
+    def fetchmany(self, size=None):
+        return self.timed_fetch(super().fetchmany, False, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self.timed_fetch(super().fetchall, False)
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+class Connection(sqlite3.Connection):
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = Cursor if current_run.get() is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+#panel and export
+def finish_run(run):
+    end_mark(run)
+    run['seconds'] = time.perf_counter() - run['started']
+    store = profile_store()
+    with store['lock']:
+        for span in run['spans']:
+            key = (run['app'], span['kind'], span['name'])
+            total = store['totals'].setdefault(key, {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0, 'bytes': 0})
+            total['calls'] += 1
+            total['seconds'] += span['seconds']
+            total['max_seconds'] = max(total['max_seconds'], span['seconds'])
+            total['rows'] += span['rows']
+            total['bytes'] += span['bytes']
+
+def aggregated_timings():
+    store = profile_store()
+    with store['lock']:
+        totals = [dict(zip(('app', 'kind', 'name'), key), **total) for key, total in store['totals'].items()]
+    df = pd.DataFrame(totals, columns=['app', 'kind', 'name', 'calls', 'seconds', 'max_seconds', 'rows', 'bytes'])
+    df['mean_seconds'] = df['seconds'] / df['calls']
+    return df.sort_values('seconds', ascending=False).to_csv(index=False)
+
+def slow_query_log():
+    store = profile_store()
+    with store['lock']:
+        entries = list(store['slow_queries'])
+    df = pd.DataFrame(entries, columns=['logged_at', 'app', 'seconds', 'rows', 'bytes', 'query'])
+    return df.iloc[::-1]
+
+def waterfall(spans):
+    fig = go.Figure(go.Bar(
+        y=[f"{i + 1}. {span['name']}" for i, span in enumerate(spans)],
+        x=[span['seconds'] * 1000 for span in spans],
+        base=[span['start'] * 1000 for span in spans],
+        orientation='h',
+        marker_color=['#EF553B' if span.get('slow') else '#636EFA' if span['kind'] == 'query' else '#00CC96'
+                      for span in spans],
+        hovertext=[f"{span['rows']:,} rows, {span['bytes']:,} bytes" for span in spans],
+    ))
+    fig.update_layout(height=max(200, 22 * len(spans) + 60), margin=dict(l=0, r=0, t=10, b=0),
+                      xaxis_title='ms since rerun start', yaxis=dict(autorange='reversed'), showlegend=False)
+    return fig
+
+def render_panel():
+    run = current_run.get()
+    if run is None:
+        return
+    finish_run(run)
+    spans = run['spans']
+    queries = [span for span in spans if span['kind'] == 'query']
+
+    with st.sidebar.expander('Rerun profile', expanded=True):
+        col1, col2 = st.columns(2)
+        col1.metric('Rerun', f"{run['seconds'] * 1000:,.0f} ms")
+        col2.metric('Queries', f"{len(queries)} ({sum(span['seconds'] for span in queries) * 1000:,.0f} ms)")
+        st.caption(f"{sum(span['rows'] for span in queries):,} rows, {sum(span['bytes'] for span in queries):,} bytes fetched")
+        if spans:
+            st.plotly_chart(waterfall(spans), use_container_width=True)
+            st.dataframe(pd.DataFrame(spans, columns=['kind', 'name', 'start', 'seconds', 'rows', 'bytes']), hide_index=True)
+
+        slow = slow_query_log()
+        st.caption(f'Slow queries (over {SLOW_QUERY_S * 1000:.0f} ms)')
+        if slow.empty:
+            st.write('None logged yet.')
+        else:
+            st.dataframe(slow, hide_index=True)
+
+        st.download_button('Download aggregated timings', aggregated_timings, 'profile_timings.csv', 'text/csv',
+                           on_click='ignore')
+        st.download_button('Download slow-query log', lambda: slow_query_log().to_csv(index=False),
+                           'slow_queries.csv', 'text/csv', on_click='ignore')